@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import posixpath
+import random
+
+
+####################################################
+# Synthetic GitBook Corpus
+class Corpus():
+    """
+    Class that writes a reproducible GitBook source tree for
+    benchmarking.  The same seed and parameters always produce the
+    same files, links and SUMMARY.md.
+    """
+
+    def __init__(self, path, files = 1000, depth = 3, links = 10,
+                 hit_ratio = 0.9, summary_ratio = 1.0, headings = 5, seed = 0):
+        self.path = path
+        self.files = files
+        self.depth = depth
+        self.links = links
+        self.hit_ratio = hit_ratio
+        self.summary_ratio = summary_ratio
+        self.headings = headings
+        self.seed = seed
+
+        # Directory Fan-out per Nesting Level
+        self.fanout = max(2, int(round(files ** (1.0 / max(depth, 1)))))
+
+    # Write the Corpus, Returning the Page Paths
+    def generate(self):
+        rand = random.Random(self.seed)
+        pages = [self.page_path(i) for i in range(self.files)]
+
+        for i, page in enumerate(pages):
+            lines = ['# Page %d' % i, '']
+            for h in range(self.headings):
+                lines.append('## Section %d of page %d' % (h, i))
+                lines.append('')
+                lines.append('Lorem ipsum dolor sit amet, consectetur adipiscing elit.')
+                for l in range(self.links // self.headings + (h < self.links % self.headings)):
+                    lines.append(self.link_line(rand, page, pages))
+                lines.append('')
+
+            # Fenced Code Blocks Must Be Skipped by the Scanner
+            lines += ['```', '# not a heading', '[not a link](nowhere.md)', '```', '']
+            self.write(page, '\n'.join(lines))
+
+        self.write('README.md', '# Synthetic Book\n\nGenerated by benchmarks/corpus.py.\n')
+        self.write('SUMMARY.md', self.summary(rand, pages))
+        return pages
+
+    # Nested Path for Page i
+    def page_path(self, i):
+        parts = []
+        for level in range(self.depth - 1, 0, -1):
+            parts.append('part%d' % ((i // self.fanout ** level) % self.fanout))
+        parts.append('page%d.md' % i)
+        return '/'.join(parts)
+
+    # Line with One Link, Hitting or Missing an Anchor
+    def link_line(self, rand, page, pages):
+        target = rand.randrange(len(pages))
+        href = posixpath.relpath(pages[target], posixpath.dirname(page) or '.')
+        if rand.random() < self.hit_ratio:
+            anchor = 'section-%d-of-page-%d' % (rand.randrange(self.headings), target)
+        else:
+            anchor = 'missing-%d' % rand.randrange(1000000)
+        return 'See [page %d](%s#%s) for details.' % (target, href, anchor)
+
+    # Table of Contents Listing summary_ratio of the Pages
+    def summary(self, rand, pages):
+        listed = sorted(rand.sample(range(len(pages)), int(len(pages) * self.summary_ratio)))
+        lines = ['# Summary', '', '* [Introduction](README.md)']
+        for i in listed:
+            indent = '  ' * (pages[i].count('/'))
+            lines.append('%s* [Page %d](%s)' % (indent, i, pages[i]))
+        return '\n'.join(lines) + '\n'
+
+    # Edit One Page, Renaming a Heading Other Pages Link To
+    def edit(self, i = 0):
+        page = self.page_path(i)
+        filename = os.path.join(self.path, page)
+        with open(filename) as f:
+            text = f.read()
+        text = text.replace('## Section 0 of page %d\n' % i,
+                            '## Section 0 of page %d, revised\n' % i)
+        self.write(page, text + '\nEdited for the single-file benchmark.\n')
+
+    def write(self, page, text):
+        filename = os.path.join(self.path, page)
+        os.makedirs(os.path.dirname(filename), exist_ok = True)
+        with open(filename, 'w') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-n', '--files', type=int, default=1000)
+    parser.add_argument('-d', '--depth', type=int, default=3)
+    parser.add_argument('-l', '--links', type=int, default=10)
+    parser.add_argument('--hit-ratio', type=float, default=0.9)
+    parser.add_argument('--summary-ratio', type=float, default=1.0)
+    parser.add_argument('--headings', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('path')
+
+    args = parser.parse_args()
+
+    corpus = Corpus(args.path, args.files, args.depth, args.links, args.hit_ratio,
+                    args.summary_ratio, args.headings, args.seed)
+    corpus.generate()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'mdlint'))
+import libmdlint
+from corpus import Corpus
+
+
+####################################################
+# Phase Timers
+class PhaseTimer():
+    """
+    Class that wraps the methods behind each lint phase while a run
+    is in progress, accumulating exclusive wall time per phase, so
+    that parsing is reported net of the writes made from parse_files().
+    """
+
+    phases = {
+        'discovery': [(libmdlint.Main, 'check_manifest'),
+                      (libmdlint.Main, 'generate_filelist')],
+        'parse': [(libmdlint.Main, 'scan_sources'),
+                  (libmdlint.Main, 'parse_files')],
+        'write': [(libmdlint.Main, 'store_repository'),
+                  (libmdlint.LocalDatabase, 'store_files'),
+                  (libmdlint.LocalDatabase, 'commit'),
+                  (libmdlint.MemoryDatabase, 'store_files')],
+        'validation': [(libmdlint.Main, 'read_summary'),
+                       (libmdlint.Main, 'check_links')],
+        'report': [(libmdlint.Main, 'report_links'),
+                   (libmdlint.Main, 'report_problems'),
+                   (libmdlint.Main, 'replay'),
+                   (libmdlint.Main, 'print_report')]
+    }
+
+    def __init__(self):
+        self.times = dict.fromkeys(self.phases, 0.0)
+        self.originals = []
+        self.stack = []
+
+    def __enter__(self):
+        for phase, methods in self.phases.items():
+            for cls, name in methods:
+                original = getattr(cls, name)
+                self.originals.append((cls, name, original))
+                setattr(cls, name, self.wrap(phase, original))
+        return self
+
+    def __exit__(self, *exc):
+        for cls, name, original in self.originals:
+            setattr(cls, name, original)
+
+    def wrap(self, phase, method):
+        def timed(*args, **kwargs):
+            self.stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.times[phase] += elapsed - self.stack.pop()
+                if self.stack:
+                    self.stack[-1] += elapsed
+        return timed
+
+
+# Run Main Once, Returning Phase Timings
+def lint(source, workdir, jobs, no_db = False):
+    args = argparse.Namespace(source = source, verbose = False, update = False,
+                              since = None, cache = 'mdlint.db',
+                              export_cache = None, import_cache = None,
+                              no_db = no_db, rules = None,
+                              jobs = jobs, watch = False, socket = None,
+                              external = False, ttl = 86400,
+                              profile = None, pstats = None,
+                              output = None, format = None)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with PhaseTimer() as timer:
+            start = time.perf_counter()
+            libmdlint.Main(args)
+            total = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+    results = dict(timer.times)
+    results['total'] = total
+    return results
+
+
+# Cold, Warm-cache and Single-file-edit Scenarios
+def run_scenarios(corpus, workdir, repeat, jobs, no_db = False):
+    results = {}
+    for scenario in ('cold', 'warm', 'edit'):
+        runs = []
+        for i in range(repeat):
+            reset(corpus, workdir)
+            if scenario != 'cold':
+                lint(corpus.path, workdir, jobs, no_db)
+            if scenario == 'edit':
+                corpus.edit(i % corpus.files)
+            runs.append(lint(corpus.path, workdir, jobs, no_db))
+
+        # Keep the Fastest Run per Phase
+        results[scenario] = {phase: min(run[phase] for run in runs)
+                             for phase in runs[0]}
+    return results
+
+
+# Regenerate Corpus and Drop the Cache
+def reset(corpus, workdir):
+    if os.path.exists(corpus.path):
+        shutil.rmtree(corpus.path)
+    corpus.generate()
+    for name in os.listdir(workdir):
+        if name.startswith(('mdlint.db', 'mdlint.manifest')):
+            os.remove(os.path.join(workdir, name))
+
+
+# Compare Against a Baseline, Returning Regressions
+def compare(results, baseline, tolerance, min_delta):
+    regressions = []
+    for scenario, phases in baseline['results'].items():
+        for phase, base in phases.items():
+            current = results.get(scenario, {}).get(phase)
+            if current is None:
+                continue
+            if current > base * (1 + tolerance) and current - base > min_delta:
+                regressions.append((scenario, phase, base, current))
+    return regressions
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-n', '--files', type=int, default=1000)
+    parser.add_argument('-d', '--depth', type=int, default=3)
+    parser.add_argument('-l', '--links', type=int, default=10)
+    parser.add_argument('--hit-ratio', type=float, default=0.9)
+    parser.add_argument('--summary-ratio', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-j', '--jobs', type=int, default=1)
+    parser.add_argument('--no-db', action='store_true')
+    parser.add_argument('-b', '--baseline')
+    parser.add_argument('-s', '--save')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--min-delta', type=float, default=0.005)
+
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix = 'mdlint-bench-')
+    corpus = Corpus(os.path.join(workdir, 'book'), args.files, args.depth, args.links,
+                    args.hit_ratio, args.summary_ratio, seed = args.seed)
+    try:
+        results = run_scenarios(corpus, workdir, args.repeat, args.jobs, args.no_db)
+    finally:
+        shutil.rmtree(workdir)
+
+    document = {
+        'corpus': {
+            'files': args.files,
+            'depth': args.depth,
+            'links': args.links,
+            'hit_ratio': args.hit_ratio,
+            'summary_ratio': args.summary_ratio,
+            'seed': args.seed
+        },
+        'jobs': args.jobs,
+        'no_db': args.no_db,
+        'python': sys.version.split()[0],
+        'results': results
+    }
+
+    for scenario, phases in results.items():
+        print('%-6s %s' % (scenario, '  '.join('%s=%.4f' % i for i in phases.items())))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(document, f, indent = 2, sort_keys = True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['corpus'] != document['corpus']:
+            print('warning: baseline was recorded with a different corpus')
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        for scenario, phase, base, current in regressions:
+            print('REGRESSION %s/%s: %.4f -> %.4f' % (scenario, phase, base, current))
+        if regressions:
+            sys.exit(1)
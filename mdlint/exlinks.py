@@ -0,0 +1,128 @@
+# Module Imports
+import asyncio
+import logging
+import ssl
+import urllib.parse
+
+logger = logging.getLogger('mdlint')
+
+
+##################################
+# External Link Checker
+class LinkChecker():
+
+    user_agent = 'mdlint/0.1'
+
+    def __init__(self, per_host = 4, timeout = 10):
+        self.per_host = per_host
+        self.timeout = timeout
+
+    # Check URLs, Returning {url: status} with None for Failures
+    def check(self, urls):
+        return asyncio.run(self.check_all(urls))
+
+    async def check_all(self, urls):
+        self.pools = {}
+        urls = list(dict.fromkeys(urls))
+        try:
+            statuses = await asyncio.gather(*[self.probe(url) for url in urls])
+        finally:
+            for pool in self.pools.values():
+                pool.close()
+        return dict(zip(urls, statuses))
+
+    # HEAD the URL, Falling Back to GET
+    async def probe(self, url):
+        parts = urllib.parse.urlsplit(url)
+        secure = parts.scheme == 'https'
+        try:
+            port = parts.port or (443 if secure else 80)
+        except ValueError:
+            return None
+        key = (parts.scheme, parts.hostname, port)
+        if key not in self.pools:
+            self.pools[key] = HostPool(parts.hostname, port, secure, self.per_host)
+        pool = self.pools[key]
+
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        async with pool.semaphore:
+            try:
+                status = await asyncio.wait_for(
+                    self.request(pool, 'HEAD', target), self.timeout)
+                if status >= 400:
+                    status = await asyncio.wait_for(
+                        self.request(pool, 'GET', target), self.timeout)
+                return status
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    ValueError) as error:
+                logger.debug("External link %s failed: %s" % (url, error))
+                return None
+
+    # Send One Request, Retrying Once if a Pooled Connection Went Stale
+    async def request(self, pool, method, target):
+        for attempt in (0, 1):
+            reader, writer, reused = await pool.acquire()
+            keep_alive = method == 'HEAD'
+            request = ('%s %s HTTP/1.1\r\nHost: %s\r\nUser-Agent: %s\r\n'
+                       'Connection: %s\r\n\r\n') % (
+                           method, target, pool.host, self.user_agent,
+                           'keep-alive' if keep_alive else 'close')
+            try:
+                writer.write(request.encode('ascii'))
+                await writer.drain()
+                status_line = await reader.readline()
+                if status_line == b'':
+                    raise ConnectionResetError("connection closed by server")
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+
+            version, status = status_line.decode('latin-1').split(None, 2)[:2]
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip().lower()
+
+            if (keep_alive and version != 'HTTP/1.0'
+                    and headers.get('connection') != 'close'):
+                pool.release(reader, writer)
+            else:
+                writer.close()
+            return int(status)
+
+
+# Idle Keep-Alive Connections to One Host
+class HostPool():
+
+    def __init__(self, host, port, secure, limit):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if secure else None
+        self.semaphore = asyncio.Semaphore(limit)
+        self.idle = []
+
+    async def acquire(self):
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not reader.at_eof():
+                return (reader, writer, True)
+            writer.close()
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl = self.ssl)
+        return (reader, writer, False)
+
+    def release(self, reader, writer):
+        self.idle.append((reader, writer))
+
+    def close(self):
+        for reader, writer in self.idle:
+            writer.close()
+        self.idle = []
@@ -1,11 +1,25 @@
 # Module Imports
 import os
+import sys
+import fnmatch
 import logging
+import posixpath
 import re
 import sqlite3 as sqlite
 import time
 import prettytable
-import subprocess
+import select
+import socket
+import struct
+import mmap
+import json
+import hashlib
+import contextlib
+import html
+import array
+import argparse
+
+logger = logging.getLogger('mdlint')
 
 # Main Process
 class Main():
@@ -13,91 +27,329 @@ class Main():
     # Initialize Class
     def __init__(self, args):
         self.args = args
-        self.report = {}
-
-        # Configure Logging
-        if self.args.verbose:
-            loglevel = logging.DEBUG
-        else:
-            loglevel = logging.INFO
-        logformat = '[%(levelname)s %(asctime)s]: %(msg)s'
-        logging.basicConfig(filename = 'mdlint.log',
-                            level = loglevel,
-                            format = logformat)
-        logging.info("Initializing MDLint.")
 
         # Define Directory/Source Paths
         self.cwd = os.getcwd()
         source = os.path.abspath(self.args.source)
+        if 'SUMMARY.md' in self.args.source:
+            source = os.path.abspath(source.split('SUMMARY.md')[0])
+
+        # Open the Findings Sink, Keeping the Text Report only when it is Read
+        self.output = open_writer(self.args.output, self.args.format, self.cwd)
+        self.keep_report = (self.output is None or self.args.verbose
+                            or self.args.watch)
+
+        # Start Profiling
+        self.profiler = Profiler(self.args.profile is not None
+                                 or self.args.pstats is not None)
+        if self.args.pstats is not None:
+            self.profiler.start_cprofile()
+
+        # Replay the Previous Result when no File has Changed
+        self.init_state()
+        self.cache = os.path.join(self.cwd, self.args.cache)
+        with self.profiler.phase('discovery'):
+            unchanged = self.check_manifest(source)
+        if unchanged:
+            with self.profiler.phase('report'):
+                self.find_books()
+                self.replay(self.manifest.findings())
+        else:
+            self.configure_logging()
 
-        # Initialize Database
-        self.database = LocalDatabase(self.args)
-        
-        # Generate File List
-        self.source = self.generate_filelist(source)
+            # Initialize Database
+            with self.profiler.phase('init'):
+                self.database = self.open_database()
 
-        # Read Files
-        if 'SUMMARY.md' in self.source or self.args.update:
-            self.read_summary()
+            # Generate File List
+            with self.profiler.phase('discovery'):
+                self.source = self.generate_filelist(source)
+            self.lint()
+            if self.manifest is not None:
+                self.replay(self.manifest.carried())
+            if self.args.export_cache is not None:
+                self.database.export(os.path.join(self.cwd, self.args.export_cache))
 
-        # Update headings Table with correct links
-        self.update_files(self.source)
-        self.read_files(self.source)
-        self.check_links()
-        
         # Report Findings
         if self.args.verbose:
-            self.print_report()
+            with self.profiler.phase('report'):
+                self.print_report()
+
+        # Write Profile
+        if self.args.pstats is not None:
+            self.profiler.stop_cprofile(os.path.join(self.cwd, self.args.pstats))
+        if self.args.profile is not None:
+            path = self.args.profile
+            if path != '-':
+                path = os.path.join(self.cwd, path)
+            self.profiler.write(path)
+
+        # Stay Resident and Re-lint on Change
+        if self.args.watch:
+            Watcher(self, self.args.socket).run()
+        if self.output is not None:
+            self.output.close()
+
+    # Lint State, Shared with Linter
+    def init_state(self):
+        self.report = {}
+        self.root = ''
+        self.rules = sorted(set(self.args.rules or ()))
+        self.walker = None
+        self.manifest = None
+        self.hashes = {}
+        self.unhashed = {}
+        self.updates = []
+        self.removed = []
+        self.books = {}
+        self.book_dirs = {}
+        self.summary_read = False
+        self.full_report = True
+
+    # Open the Cache, or Keep Everything in Memory for One-shot Runs
+    def open_database(self):
+        if self.args.no_db:
+            return MemoryDatabase(self.args, self.profiler)
+        os.makedirs(os.path.dirname(self.cache), exist_ok = True)
+        return LocalDatabase(self.args, self.profiler, self.cache)
+
+    # Configure Logging
+    def configure_logging(self):
+        if self.args.verbose:
+            loglevel = logging.DEBUG
+        else:
+            loglevel = logging.INFO
+        logformat = '[%(levelname)s %(asctime)s]: %(msg)s'
+        logging.basicConfig(filename = os.path.join(self.cwd, 'mdlint.log'),
+                            level = loglevel,
+                            format = logformat)
+        logger.info("Initializing MDLint.")
+
+    # Compare the Source Tree Against the Manifest in One Stat Sweep
+    def check_manifest(self, path):
+        if self.args.no_db or not os.path.isdir(path):
+            return False
+        config = hashlib.sha1(json.dumps([
+            path, Manifest.version, LocalDatabase.schema_version,
+            parser_version(self.rules)
+        ]).encode()).hexdigest()
+        self.manifest = Manifest(os.path.splitext(self.cache)[0] + '.manifest', config)
+
+        # A Rebuilt or Imported Database or a Missing Snapshot Needs a Complete Report
+        if (self.args.update or self.args.import_cache is not None
+                or not self.manifest.load()):
+            return False
+        self.full_report = False
+        if self.args.external or self.args.watch or self.args.export_cache is not None:
+            return False
+        self.walk_source(path)
+        return self.filestats == self.manifest.files
+
+    # Replay Findings Recorded by an Earlier Run
+    def replay(self, findings):
+        if self.keep_report:
+            for book in self.books:
+                summary = posixpath.join(book, 'SUMMARY.md')
+                if summary in self.filestats:
+                    entry = self.report_entry(summary)
+                    entry.setdefault('duplicates', [])
+                    entry.setdefault('orphans', [])
+        for rule, filename, line, target in findings:
+            self.emit(rule, filename, line, target, record = False)
+
+    # Lint Files in self.source and their Dependent Links
+    def lint(self):
+
+        # Read Files, Re-checking the Toctree when Files Come or Go
+        if self.manifest is not None:
+            self.manifest.begin()
+        self.summary_read = False
+        self.find_books()
+        scans = self.scan_sources(self.source)
+
+        # Writes Start Here; the Scan Above Holds No Lock on a Shared Cache
+        self.store_repository()
+        if (self.moved or self.args.update or self.full_report
+                or any(posixpath.basename(i) in ('SUMMARY.md', 'LANGS.md')
+                       for i in self.source)):
+            with self.profiler.phase('summary'):
+                self.read_summary()
+
+        # Update headings and inlinks Tables in a Single Pass
+        self.idrefs = self.database.get_idrefs()
+        self.anchors = AnchorIndex(self.database)
+        self.parse_files(scans)
+        with self.profiler.phase('validation'):
+            self.check_links()
+        with self.profiler.phase('report'):
+            self.report_links()
+            self.report_problems()
+        with self.profiler.phase('commit'):
+            self.database.commit()
+        if self.args.external:
+            with self.profiler.phase('external'):
+                self.check_exlinks()
+        if self.manifest is not None:
+            self.manifest.save(self.filestats)
+        self.full_report = False
 
     ####################################################
     # Generate File List
     def generate_filelist(self, path):
 
-        if 'SUMMARY.md' in self.args.source:
-                path = os.path.abspath(path.split('SUMMARY.md')[0])
-        
         if os.path.isfile(path):
-            return [path]
+            logger.critical("Source %s is a file; lint its directory instead." % path)
+            sys.exit("mdlint: source must be a directory, not a file")
         elif os.path.isdir(path):
-                
-            os.chdir(path)
-            base = os.listdir('.')
-            result = []
-            cursor = self.database.get_cursor()
-            
-            for i in base:
-                if i == None:
-                    pass
-                elif re.match('.*\.md$', i):
-                    statement = 'SELECT * FROM repository WHERE filename = "%s"' % i
-                    cursor.execute(statement)
-                    fetch = cursor.fetchone()
-                    modtime = os.path.getmtime(i)
-                    if fetch == [] or fetch == None:
-                        self.update_repository(cursor, i, modtime)
-                        result.append(i)
+
+            if self.walker is None:
+                self.walk_source(path)
+            known = self.database.get_repository()
+
+            # Ask git for Changed Files when the Cache Holds the Base
+            changed = None
+            if self.args.since is not None and known:
+                changed = self.git_changes(self.args.since)
+
+            # Compare Against Repository in One Pass
+            candidates = []
+            restat = []
+            self.moved = []
+            for filename, (modtime, size) in self.filestats.items():
+                row = known.pop(filename, None)
+                if row is None:
+                    self.moved.append((filename,))
+                    candidates.append((filename, modtime, size, None))
+                elif row['last_update'] != modtime or row['size'] != size:
+                    if changed is None or filename in changed:
+                        candidates.append((filename, modtime, size, row['hash']))
                     else:
-                        dbmtime = fetch['last_update']
-                        if dbmtime < modtime:
-                            self.update_repository(cursor, i, modtime)
-                            result.append(i)
-                            
-                            
-            cursor.close()
-            self.database.commit()
-            
-            return result
+                        restat.append((filename, modtime, size, row['hash']))
+
+            # Record Added and Removed Files for Dependent Links
+            self.moved += [(filename,) for filename in known]
+            self.updates += restat
+            result = self.changed_content(candidates)
+            self.removed += [(row['id'],) for row in known.values()]
+
+            return sorted(result)
 
         else:
-            logging.critical("Unable to identify source files.")
+            logger.critical("Unable to identify source files.")
             sys.exit(1)
 
-    # Update Repository
-    def update_repository(self, cursor, filename, modtime):
-        statement = ("REPLACE INTO repository('filename', 'last_update')"
-                     "VALUES('%s', %s)") % (filename, int(modtime))
-        cursor.execute(statement)
-
+    # Markdown Files Differing Between a git Ref and the Working Tree
+    def git_changes(self, ref):
+        import subprocess
+        try:
+            output = subprocess.run(
+                ['git', 'diff', '--name-only', '--no-renames', '--relative', '-z',
+                 ref, '--'], cwd = self.root, capture_output = True,
+                check = True).stdout
+        except (OSError, subprocess.CalledProcessError) as error:
+            logger.critical("Unable to diff against %s: %s" % (ref, error))
+            sys.exit("mdlint: unable to diff against %s" % ref)
+        changed = set(os.fsdecode(i) for i in output.split(b'\0') if i)
+        logger.info("%s files changed since %s." % (len(changed), ref))
+        return changed
+
+    # Hash Candidate Files, Returning those whose Content Changed; Files
+    # with no Recorded Hash are Scanned Anyway, so are Hashed by the Scan
+    def changed_content(self, candidates):
+        result = []
+        for filename, modtime, size, recorded in candidates:
+            if recorded is None:
+                self.unhashed[filename] = (modtime, size)
+                result.append(filename)
+                continue
+            digest = content_hash(os.path.join(self.root, filename))
+            if self.profiler.enabled:
+                self.profiler.count('files_read')
+                self.profiler.count('bytes_read', size)
+            self.hashes[filename] = digest
+            self.updates.append((filename, modtime, size, digest))
+            if digest != recorded:
+                result.append(filename)
+        return result
+
+    # Record Stats and Hashes from Discovery with the Parsed Content
+    def store_repository(self):
+        self.database.update_repository(self.updates)
+        self.database.remove_files(self.removed)
+        self.updates = []
+        self.removed = []
+
+    # Find Books: Directories with a SUMMARY.md or Listed in a LANGS.md
+    def find_books(self):
+        books = set()
+        for filename in self.filestats:
+            directory, name = posixpath.split(filename)
+            if name == 'SUMMARY.md':
+                books.add(directory)
+            elif name == 'LANGS.md':
+                for entry in Toctree(filename, self.root).parse().entries:
+                    if entry[4] not in ('', '.'):
+                        books.add(entry[4])
+
+        # Group Files by their Innermost Book
+        self.books = {book: [] for book in sorted(books)}
+        self.book_dirs = {}
+        for filename in self.filestats:
+            book = self.book_of(filename)
+            if book is not None:
+                self.books[book].append(filename)
+
+    # Innermost Book Containing a File, '' for the Root and None for No Book
+    def book_of(self, filename):
+        directory = posixpath.dirname(filename)
+        if directory not in self.book_dirs:
+            parent = directory
+            while parent not in self.books and posixpath.dirname(parent) != parent:
+                parent = posixpath.dirname(parent)
+            self.book_dirs[directory] = parent if parent in self.books else None
+        return self.book_dirs[directory]
+
+    # Stat the Source Tree from its Root; Paths Stay Relative to it
+    def walk_source(self, path):
+        self.root = path
+        self.walker = SourceWalker(path)
+        self.filestats = self.walker.walk()
+
+    # Refresh Stats for Touched Paths Without Walking the Tree
+    def refresh_filelist(self, paths):
+        candidates = []
+        removed = []
+        self.moved = []
+        for filename in paths:
+            name = posixpath.basename(filename)
+            try:
+                stat = os.stat(os.path.join(self.root, filename))
+            except OSError:
+                stat = None
+
+            if stat is None or self.walker.ignored(filename, name, False):
+                if self.filestats.pop(filename, None) is not None:
+                    removed.append((self.get_idref(filename),))
+                    self.moved.append((filename,))
+            elif name.endswith(self.walker.ext):
+                modtime, size = stat.st_mtime_ns, stat.st_size
+                previous = self.filestats.get(filename)
+                if previous is None:
+                    self.moved.append((filename,))
+                if previous != (modtime, size):
+                    self.filestats[filename] = (modtime, size)
+                    candidates.append((filename, modtime, size))
+
+        # Look Up Recorded Hashes only when Something Moved
+        if candidates:
+            known = self.database.get_repository()
+            candidates = [(filename, modtime, size,
+                           known[filename]['hash'] if filename in known else None)
+                          for filename, modtime, size in candidates]
+        result = self.changed_content(candidates)
+        self.removed += removed
+        self.source = sorted(result)
+        return self.source
 
     # Get Base File Data
     def get_filedata(self, filename):
@@ -112,161 +364,105 @@ class Main():
         cursor.close()
         return results
 
-    # Link Parser
-    def parse_link(self, text):
-        work = text.strip()
-        div = work.split('](')
-        title = div[0].split('[')[1]
-        base_link = div[1].split(')')[0]
-        link = base_link
-
-
-        return [title, link]
-
-    # Update links
-    def update_links(self, cursor, filename, lineno, link):
-        # Get idref
-        statement = 'SELECT * FROM repository WHERE filename = "%s"' % filename
-        cursor.execute(statement)
-        fetch = cursor.fetchone()
-        if re.match('http://.*', link):
-            self.log_exlink(cursor, fetch['id'], lineno, link)
-        elif re.match('https://.*', link):
-            self.log_exlink(cursor, fetch['id'], lineno, link)
-        else:
-            self.log_inlink(cursor, fetch['id'], lineno, link)
-
     # Log Internal Links
-    def log_inlink(self, cursor, source_id, lineno, link):
-        anchor = 'NULL'
-        target_id = 'NULL'
-        if link[0] == "#":
-            anchor = '"%s"' % link.split('#')[1].lower()
+    def log_inlink(self, filename, source_id, lineno, link):
+        anchor = None
+        target_id = None
+        target_path = None
+        if link[:1] == "#":
+            anchor = link.split('#')[1].lower()
             target_id = source_id
+            target_path = filename
         elif "#" in link:
             base_link = link.split('#')
-            anchor = '"%s"' % base_link[1].lower()
-            target_file = base_link[0]
-            target_id = self.get_idref(cursor, target_file)
-        elif re.match('.*.md$', link):
-            target_id = self.get_idref(cursor, link)
-
-        base_statement = "INSERT INTO inlinks(source_file, target_file, valid, line, link_text, anchor) "
-        validity = 1
-        if target_id == None:
-            target_id = "NULL"
-            validity = 0
-
-        # Manage Malformed Links
-        if '"' in link:
-            link = re.sub('\"', "", link)
-            validity = 0
-        elif '\\' in link:
-            link = re.sub('\\', "", link)
-            validity = 0
-
-        predicate =  'VALUES(%s, %s, %s, "%s", %s, %s)' % (
-            source_id, target_id, validity, link, lineno, anchor)
-        statement = base_statement + predicate
-        cursor.execute(statement)
+            anchor = base_link[1].lower()
+            target_path = self.resolve_path(filename, base_link[0])
+            target_id = self.get_idref(target_path)
+        elif link.endswith('.md'):
+            target_path = self.resolve_path(filename, link)
+            target_id = self.get_idref(target_path)
+
+        return (source_id, target_id, None, lineno, link, anchor, target_path)
+
+    # Resolve Link Target Relative to Source File
+    def resolve_path(self, filename, target):
+        if target.startswith('/'):
+            root = self.book_of(filename) or ''
+            return posixpath.normpath(posixpath.join(root, target.lstrip('/')))
+        return posixpath.normpath(posixpath.join(posixpath.dirname(filename), target))
 
     # Get File Idref
-    def get_idref(self, cursor, filename):
-        try:
-            statement = 'SELECT * FROM repository WHERE filename = "%s"' % filename
-            cursor.execute(statement)
-            fetch = cursor.fetchone()
-            if fetch != None:
-                return fetch['id']
-            else:
-                return None
-        except:
-            return None
-            
+    def get_idref(self, filename):
+        return self.idrefs.get(filename)
+
     # Log External Links
-    def log_exlink(self, cursor, idref, lineno, link):
+    def log_exlink(self, idref, lineno, link):
+        return (link, idref, lineno, 0)
 
-        statement = ("REPLACE INTO exlinks (href, file_id, valid, line)"
-                     'VALUES ("%s", %s, %s, %s)') % (link, idref, 0, lineno)
-    
     # Read SUMMARY.md
     def read_summary(self):
-        # Init Cursor
-        cursor = self.database.get_cursor()
-
-        # Init Error Dict
-        errors = {
-            "duplicates": [],
-            "orphans": []
-        }
-        
-        # Reset Orphan and Duplicate Tags
-        statement = ("UPDATE repository SET orphan = 1, duplicate = 0 "
-                     'WHERE filename IS NOT "SUMMARY.md" '
-                     'AND filename IS NOT "README.md"')
-        cursor.execute(statement)
-        
-        # Init File Handler
-        f = TextFileHandler('SUMMARY.md')
-        contents = f.open()
-
-        # Check Contents
-        check = []
-        lineno = 0
-        for line in contents:
-            # Increment Line Number
-            lineno += 1
-
-            # If Line Black or Heading, Skip
-            if re.match('^[ \t\n]$', line) or line[0] == '#':
-                pass
-            else:
-                # Break Line into Relevant units
-                text = self.parse_link(line)
-                title = text[0]
-                link = text[1]
-                # Register as Present
-                statement = 'UPDATE repository SET orphan = 0 WHERE filename = "%s"' % link
-                cursor.execute(statement)
-                
-                # Check for Duplication
-                if link in check:
-                    errors['duplicates'].append(link)
-                    statement = 'UPDATE repository SET duplicate = 1 WHERE filename = "%s"' % link
-                    cursor.execute(statement)
-                check.append(link)
-
-
-        # Commit Changes
-        cursor.close()
-        self.database.commit()
-
-        # Report Orphans
-        cursor = self.database.get_cursor()
-        statement = 'SELECT * FROM repository WHERE orphan = 1'
-        cursor.execute(statement)
-        fetch = cursor.fetchall()
-        for i in fetch:
-            if i is not None:
-                errors['orphans'].append(i['filename'])
-        self.report["SUMMARY.md"] = errors
-        cursor.close()
-        f.close()
+        self.summary_read = True
+        if self.manifest is not None:
+            self.manifest.clear_summary()
+        duplicates = set()
+        orphans = set()
+        for book, filenames in self.books.items():
+            summary = posixpath.join(book, 'SUMMARY.md')
+            if not os.path.isfile(os.path.join(self.root, summary)):
+                self.report.pop(summary, None)
+                continue
+            toctree = Toctree(summary, self.root).parse()
+            book_orphans = toctree.orphans(filenames)
+            duplicates.update(entry[4] for entry in toctree.duplicates)
+            orphans.update(book_orphans)
+
+            # Record Errors
+            if self.keep_report:
+                self.report_entry(summary).update({'duplicates': [], 'orphans': []})
+            for lineno, depth, parent, title, path in toctree.duplicates:
+                self.emit('summary-duplicate', summary, lineno, path)
+            for filename in book_orphans:
+                self.emit('summary-orphan', filename, None, filename)
+        self.database.update_toctree(duplicates, orphans)
 
 
     ##############################
     # Print Report
-    def print_report(self):
-        output = ''
-        for filename in self.report:
-            if filename == 'SUMMARY.md':
-                check = self.report['SUMMARY.md']
-                output += self.format_summary(check)
-
-        print(output)
+    def print_report(self, stream = sys.stdout):
+        books = {}
+        for filename, check in self.report.items():
+            summary = (posixpath.basename(filename) == 'SUMMARY.md'
+                       and 'duplicates' in check)
+            if (summary or check['broken_links'] or check['broken_exlinks']
+                    or check['style']):
+                books.setdefault(self.book_of(filename), []).append(filename)
+
+        # Report per Book when Linting Several, Skipping Books with Nothing to Say
+        for book in sorted(books, key = lambda book: (book is None, book)):
+            if len(self.books) > 1:
+                title = 'Outside any book' if book is None else 'Book: %s' % (book or '.')
+                stream.write('%s\n%s\n\n' % (title, '=' * len(title)))
+            for filename in books[book]:
+                check = self.report[filename]
+                if posixpath.basename(filename) == 'SUMMARY.md' and 'duplicates' in check:
+                    stream.write(self.format_summary(check, filename))
+                if check['broken_links'] or check['broken_exlinks'] or check['style']:
+                    self.format_links(stream, filename, check)
+        stream.write('\n')
+
+    # Format Broken Links
+    def format_links(self, stream, filename, report):
+        stream.write('%s\n' % filename)
+        for line, link in report['broken_links']:
+            stream.write('  %s: %s\n' % (line, link))
+        for line, link in report['broken_exlinks']:
+            stream.write('  %s: %s (external)\n' % (line, link))
+        for line, rule, target in report['style']:
+            stream.write('  %s: %s\n' % (line, Finding(rule, filename, line, target).message))
+        stream.write('\n')
 
     # Format Summary Errors
-    def format_summary(self, report):
+    def format_summary(self, report, filename = 'SUMMARY.md'):
         output = ''
 
         # Log Duplicate Entries
@@ -311,7 +507,7 @@ but absent in the table of contents.  These files do not appear in the output at
         else:
             summary_text = summary_short + summary_long
 
-        header = self.heading_format("SUMMARY.md", summary_text)
+        header = self.heading_format(filename, summary_text)
         body = ''
         indent = [2, 3]
         duplicates = self.filelist_format(dup, indent, "DUPLICATES:", dup_report,
@@ -338,7 +534,6 @@ but absent in the table of contents.  These files do not appear in the output at
         
     def heading_format(self, title, text):
         header = body = ''
-        dim = subprocess.check_output(['stty', 'size']).decode().split()
         width = 75
         clearance = len(title) + 10
 
@@ -357,174 +552,356 @@ but absent in the table of contents.  These files do not appear in the output at
         return header + body
 
     ###############################
-    # Parse Headings into Database
-    def read_files(self, source):
-        cursor = self.database.get_cursor()
-        
+    # Scan Files, Fanning Out to Worker Processes when Requested
+    def scan_files(self, source):
+        jobs = self.args.jobs
+        if jobs > 1 and len(source) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            chunksize = max(1, len(source) // (jobs * 4))
+            with ProcessPoolExecutor(jobs) as pool:
+                for result in pool.map(scan_file, source, [self.root] * len(source),
+                                       [self.rules] * len(source), chunksize = chunksize):
+                    yield result
+        else:
+            for i in source:
+                yield scan_file(i, self.root, self.rules)
+
+    # Restore Parses from the Cache, Scanning the Rest
+    def parse_sources(self, source):
+        cached = self.database.get_parse_cache(
+            set(self.hashes[i] for i in source if i in self.hashes),
+            parser_version(self.rules))
+        misses = []
         for i in source:
+            entry = cached.get(self.hashes.get(i))
+            if entry is None:
+                misses.append(i)
+            else:
+                yield (i,) + entry
+
+        # Queue Fresh Parses for the Cache
+        self.scanned = misses
+        for result in self.scan_files(misses):
+            filename, digest = result[0], result[4]
+            if filename in self.unhashed:
+                self.hashes[filename] = digest
+                self.updates.append((filename,) + self.unhashed.pop(filename) + (digest,))
+            if filename in self.hashes:
+                self.parsed.append((self.hashes[filename],) + result[1:4])
+            yield result[:4]
+
+    # Scan Files Before Anything is Written
+    def scan_sources(self, source):
+        self.parsed = []
+        with self.profiler.phase('parse'):
+            return list(self.parse_sources(source))
+
+    # Index Scanned Files into Database
+    def parse_files(self, scans):
+        stale = []
+        headings = []
+        inlinks = []
+        exlinks = []
+        problems = []
+        with self.profiler.phase('parse'):
+            for i, file_headings, file_links, file_problems in scans:
+                idref = self.get_idref(i)
+                stale.append((idref,))
+                problems += [(idref, rule, lineno, detail)
+                             for rule, lineno, detail in file_problems]
+
+                # Collect Anchors
+                for lineno, anchor in file_headings:
+                    headings.append((anchor, idref, lineno))
+                self.anchors.add(idref, [anchor for lineno, anchor in file_headings])
+
+                # Collect Links
+                for lineno, title, link in file_links:
+                    if link.startswith(('http://', 'https://')):
+                        exlinks.append(self.log_exlink(idref, lineno, link))
+                    else:
+                        inlinks.append(self.log_inlink(i, idref, lineno, link))
+
+            # Resolve Links Once Every Parsed File is Indexed
+            self.anchors.load(row[1] for row in inlinks)
+            inlinks = [row[:2] + (self.anchors.valid(row[1], row[5], row[4], row[6]),)
+                       + row[3:] for row in inlinks]
+
+            # Count Input
+            if self.profiler.enabled:
+                self.profiler.count('files_read', len(self.scanned))
+                self.profiler.count('cache_hits', len(scans) - len(self.scanned))
+                self.profiler.count('bytes_read', sum(
+                    self.filestats[i][1] if i in self.filestats
+                    else os.path.getsize(os.path.join(self.root, i))
+                    for i in self.scanned))
+
+        with self.profiler.phase('write'):
+            self.database.store_files(stale, headings, inlinks, exlinks, problems)
+            self.database.store_parse_cache(self.parsed, parser_version(self.rules))
 
-            # Open File
-            f = TextFileHandler(i)
-            contents = f.open()
-
-            # Read Line by Line
-            lineno = 0
-            for line in contents:
-                lineno += 1
-                raw_links = re.findall("\[.*\]\(.*\)", line)
-                for link in raw_links:
-                    if link is not [] or not re.match('.'):
-                        base_link = self.parse_link(link)
-                        self.update_links(cursor, i, lineno, base_link[1])
-
-
-            
-            f.close()
-        cursor.close()
+    # Check Links
+    def check_links(self):
+        self.database.validate_links(self.moved, self.anchors)
+
+    # Record Broken Links for Files Touched by Validation
+    def report_links(self):
+        self.checked = self.database.get_checked_files(self.full_report)
+        if self.manifest is not None:
+            self.manifest.clear_links(self.source)
+            self.manifest.clear_links(self.checked)
+        if self.keep_report:
+            for filename in set(self.checked).union(self.source):
+                if filename in self.report:
+                    self.report[filename]['broken_links'] = []
+        for filename, line, link in self.database.get_broken_links(self.full_report):
+            self.emit('broken-link', filename, line, link)
+
+    # Record Style Problems Found by the Rules in Parsed Files
+    def report_problems(self):
+        if self.manifest is not None:
+            self.manifest.clear_problems(self.source)
+        if self.keep_report:
+            for filename in self.source:
+                if filename in self.report:
+                    self.report[filename]['style'] = []
+        for filename, rule, line, detail in self.database.get_problems(self.full_report):
+            self.emit(rule, filename, line, detail)
+
+    # Probe Stale External Links and Record Failures
+    def check_exlinks(self):
+        ttl = self.args.ttl
+        urls = self.database.get_stale_exlinks(ttl)
         self.database.commit()
+        if urls != []:
+            logger.info("Checking %s external links." % len(urls))
+            try:
+                from .exlinks import LinkChecker
+            except ImportError:
+                from exlinks import LinkChecker
+            results = LinkChecker().check(urls)
+            self.database.update_exlinks(
+                [(int(results[url] is not None and results[url] < 400), url)
+                 for url in urls])
+            self.database.commit()
 
-    # Update Database
-    def update_files(self, source):
-        cursor = self.database.get_cursor()
-        for i in source:
-
-            # Open File
-            f = TextFileHandler(i)
-            contents = f.open()
+        for filename in self.report:
+            self.report[filename]['broken_exlinks'] = []
+        for filename, line, link in self.database.get_broken_exlinks():
+            self.emit('broken-external-link', filename, line, link)
+
+    # Stream a Finding to the Output and Keep it for the Text Report
+    def emit(self, rule, filename, line, target, record = True):
+        if self.output is not None:
+            book = self.book_of(filename)
+            self.output.write(Finding(rule, filename, line, target, book))
+        if record and self.manifest is not None:
+            self.manifest.add(rule, filename, line, target)
+        if self.keep_report:
+            key = Finding.rules[rule][1]
+            if rule.startswith('summary-'):
+                summary = posixpath.join(self.book_of(filename) or '', 'SUMMARY.md')
+                entry = self.report_entry(summary)
+                if 'duplicates' not in entry:
+                    entry.update({'duplicates': [], 'orphans': []})
+                entry[key].append(target)
+            elif key == 'style':
+                self.report_entry(filename)[key].append((line, rule, target))
+            else:
+                self.report_entry(filename)[key].append((line, target))
 
-            # Find file_id for Current File
-            statement = 'SELECT * FROM repository WHERE filename = "%s"' % i
-            cursor.execute(statement)
-            file_data = cursor.fetchone()
+    # Get or Create Report Entry for a File
+    def report_entry(self, filename):
+        return self.report.setdefault(filename, {'broken_links': [],
+                                                 'broken_exlinks': [], 'style': []})
 
-            idref = file_data["id"]
 
-            
-            # Read Line by Line
-            lineno = 0
-            for line in contents:
-                if line[0] == '#':
-                    anchor = self.parse_heading(line)
-                    if anchor is not None:
-
-                        # Insert New Anchor
-                        statement = ("REPLACE INTO headings (anchor, file_id, line) "
-                                     'VALUES ("%s", %s, %s)') % (anchor, idref, lineno)
-
-                        cursor.execute(statement)
-        cursor.close()
-        self.database.commit()
-                    
-    def parse_heading(self, text):
-        match = re.split("^#* ", text)
-        if len(match) > 1:
-
-            # Reduce Markdown Heading to Base Text
-            base = match[1].strip()
-
-            # Format
-            subs = [
-                ('`', ''),
-                (' - ', '--'),
-                ('"', ''),
-                ("'",''),
-                (' ','-')
-            ]
-            for sub in subs:
-                base = re.subn(sub[0], sub[1], base)[0]
-            
-            return base.lower()
+#################################
+# Library Interface
+class Linter(Main):
+    """
+    Lints one book in-process for callers that lint it repeatedly.
+    The index and database stay open between calls, and nothing
+    changes the working directory, logging configuration or stdout.
+    With cache None the index is kept in memory; otherwise cache is
+    the path of an mdlint.db, which may be shared with the CLI.
+
+        linter = Linter('path/to/book')
+        for finding in linter.lint():
+            print(finding.filename, finding.line, finding.message)
+    """
+
+    def __init__(self, source, cache = None, jobs = 1, external = False, ttl = 86400,
+                 rules = ()):
+        self.args = argparse.Namespace(
+            source = source, cache = cache, no_db = cache is None, jobs = jobs,
+            external = external, ttl = ttl, rules = list(rules), update = False,
+            since = None, import_cache = None, export_cache = None, verbose = False,
+            watch = False)
+        self.cwd = os.getcwd()
+        self.output = None
+        self.keep_report = False
+        self.profiler = Profiler()
+        self.init_state()
+        self.root = os.path.abspath(source)
+        if not os.path.isdir(self.root):
+            raise NotADirectoryError(self.root)
+        self.cache = None if cache is None else os.path.abspath(cache)
+        self.database = self.open_database()
+
+    # Re-lint paths (Relative to the Book), or Whatever Changed when None,
+    # Returning an Iterator over Every Current Finding in the Book
+    def lint(self, paths = None):
+        if paths is None or self.walker is None:
+            self.walk_source(self.root)
+            self.source = self.generate_filelist(self.root)
+        else:
+            self.refresh_filelist(sorted(paths))
+        self.findings = []
+        self.full_report = True
 
+        # A CLI Snapshot Next to a Shared Cache Goes Stale with this Run
+        if self.args.cache is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.splitext(self.cache)[0] + '.manifest')
+        super().lint()
+        return iter(self.findings)
 
-    # Check Links
-    def check_links(self):
-        cursor = self.database.get_cursor()
-        for i in self.source:
-            if i is not "SUMMARY.md":
-                # Get Idref
-                statement = 'SELECT * FROM repository WHERE filename = "%s"' % i
-                cursor.execute(statement)
-                fetch = cursor.fetchone()
-                idref = fetch['id']
-
-                # Get Links on Page
-                statement = 'SELECT * FROM inlinks WHERE source_file = "%s"' % idref
-                cursor.execute(statement)
-                fetch = cursor.fetchall()
-                for link in fetch:
-                    link_id = link['id']
-                    target = link["target_file"]
-                    anchor = link["anchor"]
-                    line = link["line"]
-                    check_file = self.check_file_exists(cursor, target)
-                    if check_file:
-                        if anchor!= None:
-                            check_anchor = self.check_anchor_exists(cursor, target, anchor)
-                            if not check_anchor:
-                                self.invalidate_link(cursor, link_id, "inlinks")
+    def emit(self, rule, filename, line, target, record = True):
+        self.findings.append(Finding(rule, filename, line, target, self.book_of(filename)))
 
-        
-                    else:
-                        self.invalidate_link(cursor,  link_id, 'inlinks')
+    def close(self):
+        self.database.close()
 
-    def invalidate_link(self, cursor, idref, table):
-        statement = "UPDATE %s SET valid = 0 WHERE id = %s" % (table, idref)
-        cursor.execute(statement)
-        
-    def check_file_exists (self, cursor, idref):
-        statement = "SELECT * FROM repository WHERE id = %s" % idref
-        try:
-            cursor.execute(statement)
-            return True
-        except:
-            return False
 
-    def check_anchor_exists(self, cursor, idref, anchor):
-        statement = "SELECT * FROM headings WHERE file_id = %s" % idref
-        try:
-            cursor.execute(statement)
-            head = cursor.fetchall()
-            check = False
-            for i in head:
-                check_anchor = i['anchor']
-                if anchor == check_anchor:
-                    check = True
-            return check
-        except:
-            return False
-            
-    
 #################################
 # Local Database
 class LocalDatabase():
 
-    def __init__(self, args):
+    schema_version = 4
+    cache_limit = 32 * 2**20
+    busy_timeout = 60
+    batch_size = 500
+
+    def __init__(self, args, profiler = None, path = 'mdlint.db'):
         self.args = args
         self.report = []
+        self.hits = []
+        self.profiler = profiler or Profiler()
 
-        # Initialize Database
-        self.conn = sqlite.connect('mdlint.db')
+        # Initialize Database; Writes Take the Lock Up Front and Wait for it
+        self.conn = sqlite.connect(path, timeout = self.busy_timeout,
+                                   isolation_level = 'IMMEDIATE')
         self.conn.row_factory = sqlite.Row
-        
-        # Check If New
+
+        # Tune for a Rebuildable Cache Read Concurrently
+        self.get_cursor().execute("PRAGMA journal_mode = WAL")
+        self.get_cursor().execute("PRAGMA synchronous = NORMAL")
+        self.get_cursor().execute("PRAGMA temp_store = MEMORY")
+
+        # Restore an Exported Cache
+        if self.args.import_cache is not None:
+            self.restore(self.args.import_cache)
+
+        # Check Schema Version under the Write Lock
         clock = time.strftime("%c")
-        try:
-            c = self.conn.cursor()
-            c.execute("UPDATE information SET value = '%s' WHERE id = 1)" % clock)
-            c.close()
-            if self.args.update:
-                self.init_db(clock)
-        except:
+        self.conn.execute("BEGIN IMMEDIATE")
+        version = self.get_cursor().execute("PRAGMA user_version").fetchone()[0]
+        if version < self.schema_version:
+            self.migrate(version, clock)
+        elif self.args.update:
             self.init_db(clock)
+        else:
+            self.get_cursor().execute("UPDATE information SET value = ? "
+                              "WHERE field = 'db_last_update'", (clock,))
+            self.conn.commit()
+        self.check_parser(parser_version(self.args.rules))
+
+    # Replace the Cache with an Exported Copy
+    def restore(self, path):
+        from urllib.parse import quote
+        try:
+            source = sqlite.connect('file:%s?mode=ro' % quote(path), uri = True)
+            try:
+                version = source.execute("PRAGMA user_version").fetchone()[0]
+                if version > self.schema_version:
+                    raise sqlite.DatabaseError("written by a newer mdlint")
+                source.backup(self.conn)
+            finally:
+                source.close()
+        except sqlite.Error as error:
+            logger.critical("Unable to import cache from %s: %s" % (path, error))
+            sys.exit("mdlint: unable to import cache from %s" % path)
+        logger.info("Imported cache from %s." % path)
+
+    # Write a Consistent, Compacted Copy of the Cache to a Single File
+    def export(self, path):
+        self.conn.commit()
+        if os.path.exists(path):
+            os.remove(path)
+        self.conn.execute("VACUUM INTO ?", (path,))
+        logger.info("Exported cache to %s." % path)
+
+    # Reparse Every File after a Parser Change
+    def check_parser(self, version):
+        cursor = self.get_cursor()
+        cursor.execute("SELECT value FROM information WHERE field = 'parser_version'")
+        row = cursor.fetchone()
+        if row is None or row['value'] != str(version):
+            cursor.execute("UPDATE repository SET last_update = 0, hash = NULL")
+            cursor.execute("DELETE FROM parse_cache WHERE version != ?", (version,))
+            cursor.execute("INSERT OR REPLACE INTO information (field, value) "
+                           "VALUES ('parser_version', ?)", (str(version),))
+            self.conn.commit()
+        cursor.close()
 
+    # Migrate Older Databases to the Current Schema
+    def migrate(self, version, clock):
+        cursor = self.get_cursor()
+        logger.info("Migrating cache from schema version %s to %s."
+                     % (version, self.schema_version))
+
+        # Version 0: Unversioned Databases, Rebuild Derived Tables
+        if version < 1:
+            for table in ('information', 'headings', 'inlinks', 'exlinks'):
+                cursor.execute("DROP TABLE IF EXISTS %s" % table)
+            cursor.execute("PRAGMA table_info(repository)")
+            columns = [row['name'] for row in cursor.fetchall()]
+            if columns != []:
+                if 'size' not in columns:
+                    cursor.execute("ALTER TABLE repository ADD COLUMN size INTEGER")
+                cursor.execute("UPDATE repository SET last_update = 0")
+
+        # Version 1: Add Target Paths to inlinks for the Reverse Index
+        if version == 1:
+            cursor.execute("DROP TABLE IF EXISTS inlinks")
+            cursor.execute("UPDATE repository SET last_update = 0")
+
+        # Version 2: Add Content Hashes for the Parse Cache
+        if version < 3:
+            cursor.execute("PRAGMA table_info(repository)")
+            columns = [row['name'] for row in cursor.fetchall()]
+            if columns != [] and 'hash' not in columns:
+                cursor.execute("ALTER TABLE repository ADD COLUMN hash TEXT")
+
+        # Version 3: Cache Rule Problems with Parses
+        if version < 4:
+            cursor.execute("PRAGMA table_info(parse_cache)")
+            columns = [row['name'] for row in cursor.fetchall()]
+            if columns != [] and 'problems' not in columns:
+                cursor.execute("ALTER TABLE parse_cache ADD COLUMN problems TEXT")
+
+        cursor.execute("PRAGMA user_version = %d" % self.schema_version)
+        cursor.close()
+        self.init_db(clock)
 
     # Initialize Database
     def init_db(self, clock):
-        cursor = self.conn.cursor()
+        cursor = self.get_cursor()
         schema = {
             "information": [
                 "id INTEGER PRIMARY KEY AUTOINCREMENT",
-                "field TEXT",
+                "field TEXT UNIQUE",
                 "value TEXT"
             ],
             
@@ -532,6 +909,8 @@ class LocalDatabase():
                 "id INTEGER PRIMARY KEY AUTOINCREMENT",
                 "filename TEXT UNIQUE",
                 "last_update INTEGER",
+                "size INTEGER",
+                "hash TEXT",
                 "orphan INTEGER",
                 "duplicate INTEGER"
             ],
@@ -540,74 +919,1808 @@ class LocalDatabase():
                 "id INTEGER PRIMARY KEY AUTOINCREMENT",
                 "anchor TEXT",
                 "file_id INTEGER",
-                "line INTEGER"
+                "line INTEGER",
+                "UNIQUE (file_id, anchor)"
             ],
 
             "inlinks": [
                 "id INTEGER PRIMARY KEY AUTOINCREMENT",
-                "source_file TEXT",
-                "target_file TEXT",
+                "source_file INTEGER",
+                "target_file INTEGER",
                 "valid INTEGER",
                 "link_text TEXT",
                 "anchor TEXT",
-                "line INTEGER"
+                "line INTEGER",
+                "target_path TEXT"
             ],
             "exlinks": [
                 "id INTEGER PRIMARY KEY AUTOINCREMENT",
                 "href TEXT",
                 "file_id INTEGER",
+                "line INTEGER",
                 "valid INTEGER",
                 "last_check TEXT"
+            ],
+            "problems": [
+                "id INTEGER PRIMARY KEY AUTOINCREMENT",
+                "file_id INTEGER",
+                "rule TEXT",
+                "line INTEGER",
+                "detail TEXT"
+            ],
+            "parse_cache": [
+                "hash TEXT",
+                "version INTEGER",
+                "headings TEXT",
+                "links TEXT",
+                "problems TEXT",
+                "size INTEGER",
+                "used REAL",
+                "PRIMARY KEY (hash, version)"
             ]
         }
+        indexes = {
+            "inlinks_source": "inlinks (source_file)",
+            "inlinks_target": "inlinks (target_file, anchor)",
+            "inlinks_path": "inlinks (target_path)",
+            "exlinks_file": "exlinks (file_id)",
+            "exlinks_href": "exlinks (href)",
+            "problems_file": "problems (file_id)",
+            "parse_cache_used": "parse_cache (used)"
+        }
         
         for i in schema:
             statement = "CREATE TABLE IF NOT EXISTS %s (%s)" % (i, ', '.join(schema[i]))
             cursor.execute(statement)
+        for i in indexes:
+            statement = "CREATE INDEX IF NOT EXISTS %s ON %s" % (i, indexes[i])
+            cursor.execute(statement)
 
         # Update Information
-        try:
-            query = "SELECT id FROM information WHERE field = 'db_created'"
-            cursor.execute(query)
-            statement = "UPDATE information SET value = '%s' WHERE id = 1)" % clock
-            cursor.execute(statement)
-        except:
-            statement = ("INSERT INTO information ('field', 'value') "
-                         "VALUES('db_created', '%s')") % clock
-            cursor.execute(statement)
-            statement = ("INSERT INTO information ('field', 'value') "
-                         "VALUES('db_last_update', '%s')") % clock
-            cursor.execute(statement)
+        statement = ("INSERT OR IGNORE INTO information (field, value) "
+                     "VALUES ('db_created', ?)")
+        cursor.execute(statement, (clock,))
+        statement = ("INSERT OR REPLACE INTO information (field, value) "
+                     "VALUES ('db_last_update', ?)")
+        cursor.execute(statement, (clock,))
         cursor.close()
         self.conn.commit()
 
     # Get Cursor
     def get_cursor(self):
-        return self.conn.cursor()
+        cursor = self.conn.cursor()
+        if self.profiler.enabled:
+            return ProfiledCursor(cursor, self.profiler)
+        return cursor
 
     # Commit
     def commit(self):
         self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # Fetch Repository Rows Keyed by Filename
+    def get_repository(self):
+        cursor = self.get_cursor()
+        cursor.execute("SELECT id, filename, last_update, size, hash FROM repository")
+        rows = {row['filename']: row for row in cursor}
+        cursor.close()
+        return rows
+
+    # Record Modification Times
+    def update_repository(self, rows):
+        statement = ("INSERT INTO repository(filename, last_update, size, hash) "
+                     "VALUES(?, ?, ?, ?) ON CONFLICT(filename) DO UPDATE SET "
+                     "last_update = excluded.last_update, size = excluded.size, "
+                     "hash = excluded.hash")
+        cursor = self.get_cursor()
+        cursor.executemany(statement, rows)
+        cursor.close()
+
+    # Fetch Cached Parses, Returning {hash: (headings, links, problems)}
+    def get_parse_cache(self, hashes, version):
+        cursor = self.get_cursor()
+        hashes = list(hashes)
+        entries = {}
+        for start in range(0, len(hashes), self.batch_size):
+            batch = hashes[start:start + self.batch_size]
+            statement = ("SELECT hash, headings, links, problems FROM parse_cache "
+                         "WHERE version = ? AND hash IN (%s)" % ', '.join('?' * len(batch)))
+            cursor.execute(statement, [version] + batch)
+            entries.update((row['hash'], (json.loads(row['headings']),
+                                          json.loads(row['links']),
+                                          json.loads(row['problems'] or '[]')))
+                           for row in cursor)
+        cursor.close()
+
+        # Hits are Marked Recently Used with the Next Write, Keeping this Read-only
+        self.hits = list(entries)
+        return entries
+
+    # Cache Fresh Parses, Evicting the Least Recently Used Beyond cache_limit
+    def store_parse_cache(self, entries, version):
+        used = time.time()
+        if self.hits:
+            cursor = self.get_cursor()
+            cursor.executemany("UPDATE parse_cache SET used = ? WHERE version = ? "
+                               "AND hash = ?", [(used, version, i) for i in self.hits])
+            cursor.close()
+            self.hits = []
+        if entries == []:
+            return
+        rows = []
+        for digest, headings, links, problems in entries:
+            headings = json.dumps(headings)
+            links = json.dumps(links)
+            problems = json.dumps(problems)
+            rows.append((digest, version, headings, links, problems,
+                         len(headings) + len(links) + len(problems), used))
+        cursor = self.get_cursor()
+        cursor.executemany("INSERT OR REPLACE INTO parse_cache "
+                           "(hash, version, headings, links, problems, size, used) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        statement = ("DELETE FROM parse_cache WHERE rowid IN "
+                     "(SELECT rowid FROM (SELECT rowid, SUM(size) OVER "
+                     "(ORDER BY used DESC, rowid DESC) AS total "
+                     "FROM parse_cache) WHERE total > ?)")
+        cursor.execute(statement, (self.cache_limit,))
+        cursor.close()
+
+    # Drop Files Removed from the Source Tree
+    def remove_files(self, idrefs):
+        cursor = self.get_cursor()
+        cursor.executemany("DELETE FROM headings WHERE file_id = ?", idrefs)
+        cursor.executemany("DELETE FROM inlinks WHERE source_file = ?", idrefs)
+        cursor.executemany("DELETE FROM exlinks WHERE file_id = ?", idrefs)
+        cursor.executemany("DELETE FROM problems WHERE file_id = ?", idrefs)
+        cursor.executemany("DELETE FROM repository WHERE id = ?", idrefs)
+        cursor.close()
+
+    # Revalidate Links from Parsed Files and Links Depending on Them
+    def validate_links(self, moved, anchors):
+        cursor = self.get_cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS moved (filename TEXT PRIMARY KEY)")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS dirty (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM moved")
+        cursor.execute("DELETE FROM dirty")
+        cursor.executemany("INSERT OR IGNORE INTO moved (filename) VALUES (?)", moved)
+
+        # Collect Links through the Reverse Index
+        statement = ("INSERT OR IGNORE INTO dirty (id) "
+                     "SELECT id FROM inlinks "
+                     "WHERE source_file IN (SELECT id FROM checked) "
+                     "UNION SELECT inlinks.id FROM inlinks JOIN changed_anchors "
+                     "ON inlinks.target_file = changed_anchors.file_id "
+                     "AND inlinks.anchor = changed_anchors.anchor "
+                     "UNION SELECT id FROM inlinks "
+                     "WHERE target_path IN (SELECT filename FROM moved)")
+        cursor.execute(statement)
+
+        # Re-resolve Targets of Added and Removed Files
+        statement = ("UPDATE inlinks SET target_file = (SELECT id FROM repository "
+                     "WHERE repository.filename = inlinks.target_path) "
+                     "WHERE target_path IN (SELECT filename FROM moved)")
+        cursor.execute(statement)
+
+        # Resolve Links from Unparsed Files Against the Anchor Index
+        statement = ("SELECT id, target_file, anchor, link_text, target_path FROM inlinks "
+                     "WHERE id IN (SELECT id FROM dirty) "
+                     "AND source_file NOT IN (SELECT id FROM checked)")
+        rows = cursor.execute(statement).fetchall()
+        anchors.load(row['target_file'] for row in rows)
+        cursor.executemany("UPDATE inlinks SET valid = ? WHERE id = ?",
+                           [(anchors.valid(row['target_file'], row['anchor'],
+                                           row['link_text'], row['target_path']), row['id'])
+                            for row in rows])
+        cursor.close()
+
+    # Fetch (file_id, anchor) Rows for the Given Files
+    def get_anchors(self, file_ids):
+        cursor = self.get_cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS targets (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM targets")
+        cursor.executemany("INSERT INTO targets (id) VALUES (?)", [(i,) for i in file_ids])
+        cursor.execute("SELECT file_id, anchor FROM headings "
+                       "WHERE file_id IN (SELECT id FROM targets)")
+        try:
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
+
+    # List Files Whose Links Were Revalidated
+    def get_checked_files(self, every = False):
+        cursor = self.get_cursor()
+        if every:
+            statement = "SELECT filename FROM repository ORDER BY filename"
+        else:
+            statement = ("SELECT filename FROM repository WHERE id IN "
+                         "(SELECT source_file FROM inlinks WHERE id IN (SELECT id FROM dirty)) "
+                         "ORDER BY filename")
+        cursor.execute(statement)
+        files = [row['filename'] for row in cursor]
+        cursor.close()
+        return files
+
+    # Fetch Broken Links from Files Whose Links Were Revalidated
+    def get_broken_links(self, every = False):
+        cursor = self.get_cursor()
+        statement = ("SELECT repository.filename, inlinks.line, inlinks.link_text "
+                     "FROM inlinks JOIN repository ON repository.id = inlinks.source_file "
+                     "WHERE inlinks.valid = 0 %s"
+                     "ORDER BY repository.filename, inlinks.line")
+        if not every:
+            statement %= ("AND inlinks.source_file IN (SELECT source_file FROM inlinks "
+                          "WHERE id IN (SELECT id FROM dirty)) ")
+        else:
+            statement %= ''
+        cursor.execute(statement)
+        try:
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
+
+    # Fetch Rule Problems from Files Parsed by this Run
+    def get_problems(self, every = False):
+        cursor = self.get_cursor()
+        statement = ("SELECT repository.filename, problems.rule, problems.line, "
+                     "problems.detail FROM problems "
+                     "JOIN repository ON repository.id = problems.file_id %s"
+                     "ORDER BY repository.filename, problems.line, problems.id")
+        if not every:
+            statement %= "WHERE problems.file_id IN (SELECT id FROM checked) "
+        else:
+            statement %= ''
+        cursor.execute(statement)
+        try:
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
+
+    # List External Links Not Checked Within ttl Seconds
+    def get_stale_exlinks(self, ttl):
+        cursor = self.get_cursor()
+
+        # Share Results Between Rows for the Same URL
+        statement = ("UPDATE exlinks SET (valid, last_check) = "
+                     "(SELECT valid, MAX(last_check) FROM exlinks AS e "
+                     "WHERE e.href = exlinks.href) "
+                     "WHERE last_check IS NULL AND href IN "
+                     "(SELECT href FROM exlinks WHERE last_check IS NOT NULL)")
+        cursor.execute(statement)
+
+        statement = ("SELECT href FROM exlinks GROUP BY href "
+                     "HAVING MAX(last_check) IS NULL "
+                     "OR MAX(last_check) < datetime('now', ?)")
+        cursor.execute(statement, ('-%d seconds' % ttl,))
+        urls = [row['href'] for row in cursor]
+        cursor.close()
+        return urls
+
+    # Record External Link Results
+    def update_exlinks(self, results):
+        cursor = self.get_cursor()
+        cursor.executemany("UPDATE exlinks SET valid = ?, last_check = datetime('now') "
+                           "WHERE href = ?", results)
+        cursor.close()
+
+    # Fetch Broken External Links
+    def get_broken_exlinks(self):
+        cursor = self.get_cursor()
+        statement = ("SELECT repository.filename, exlinks.line, exlinks.href "
+                     "FROM exlinks JOIN repository ON repository.id = exlinks.file_id "
+                     "WHERE exlinks.valid = 0 AND exlinks.last_check IS NOT NULL "
+                     "ORDER BY repository.filename, exlinks.line")
+        cursor.execute(statement)
+        try:
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
+
+    # Map Filenames to Repository Ids
+    def get_idrefs(self):
+        cursor = self.get_cursor()
+        cursor.execute("SELECT id, filename FROM repository")
+        idrefs = {row['filename']: row['id'] for row in cursor}
+        cursor.close()
+        return idrefs
+
+    # Replace Parsed Entries for Files
+    def store_files(self, stale, headings, inlinks, exlinks, problems):
+        cursor = self.get_cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS checked (id INTEGER PRIMARY KEY)")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS changed_anchors "
+                       "(file_id INTEGER, anchor TEXT)")
+        cursor.execute("DELETE FROM checked")
+        cursor.execute("DELETE FROM changed_anchors")
+        cursor.executemany("INSERT OR IGNORE INTO checked (id) VALUES (?)", stale)
+
+        # Keep Previous Anchors to Find Changed Headings
+        cursor.execute("INSERT INTO changed_anchors SELECT file_id, anchor FROM headings "
+                       "WHERE file_id IN (SELECT id FROM checked)")
+
+        # Keep External Link Results Across Re-parses
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS exlink_cache "
+                       "(href TEXT PRIMARY KEY, valid INTEGER, last_check TEXT)")
+        cursor.execute("DELETE FROM exlink_cache")
+        cursor.execute("INSERT OR REPLACE INTO exlink_cache "
+                       "SELECT href, valid, last_check FROM exlinks "
+                       "WHERE file_id IN (SELECT id FROM checked) "
+                       "AND last_check IS NOT NULL ORDER BY last_check")
+
+        cursor.executemany("DELETE FROM headings WHERE file_id = ?", stale)
+        cursor.executemany("DELETE FROM inlinks WHERE source_file = ?", stale)
+        cursor.executemany("DELETE FROM exlinks WHERE file_id = ?", stale)
+        cursor.executemany("DELETE FROM problems WHERE file_id = ?", stale)
+        cursor.executemany("INSERT OR IGNORE INTO headings (anchor, file_id, line) "
+                           "VALUES (?, ?, ?)", headings)
+        cursor.executemany("INSERT INTO problems (file_id, rule, line, detail) "
+                           "VALUES (?, ?, ?, ?)", problems)
+        cursor.executemany("INSERT INTO inlinks (source_file, target_file, valid, "
+                           "line, link_text, anchor, target_path) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?)", inlinks)
+        cursor.executemany("INSERT INTO exlinks (href, file_id, line, valid) "
+                           "VALUES (?, ?, ?, ?)", exlinks)
+        cursor.execute("UPDATE exlinks SET (valid, last_check) = "
+                       "(SELECT valid, last_check FROM exlink_cache "
+                       "WHERE exlink_cache.href = exlinks.href) "
+                       "WHERE last_check IS NULL "
+                       "AND href IN (SELECT href FROM exlink_cache)")
+
+        # Reduce to Anchors Added or Removed by this Run
+        statement = ("SELECT file_id, anchor FROM changed_anchors "
+                     "EXCEPT SELECT file_id, anchor FROM headings "
+                     "WHERE file_id IN (SELECT id FROM checked) "
+                     "UNION SELECT file_id, anchor FROM ("
+                     "SELECT file_id, anchor FROM headings "
+                     "WHERE file_id IN (SELECT id FROM checked) "
+                     "EXCEPT SELECT file_id, anchor FROM changed_anchors)")
+        changed = cursor.execute(statement).fetchall()
+        cursor.execute("DELETE FROM changed_anchors")
+        cursor.executemany("INSERT INTO changed_anchors (file_id, anchor) VALUES (?, ?)",
+                           changed)
+        cursor.close()
     
+    # Flag Orphans and Duplicates from the Toctree in Bulk
+    def update_toctree(self, duplicates, orphans):
+        cursor = self.get_cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS toctree "
+                       "(filename TEXT PRIMARY KEY, duplicate INTEGER, orphan INTEGER)")
+        cursor.execute("DELETE FROM toctree")
+        cursor.executemany("INSERT INTO toctree (filename, duplicate, orphan) "
+                           "VALUES (?, ?, ?)",
+                           [(i, 1, 0) for i in duplicates] + [(i, 0, 1) for i in orphans])
+        statement = ("UPDATE repository SET "
+                     "orphan = COALESCE((SELECT orphan FROM toctree "
+                     "WHERE toctree.filename = repository.filename), 0), "
+                     "duplicate = COALESCE((SELECT duplicate FROM toctree "
+                     "WHERE toctree.filename = repository.filename), 0)")
+        cursor.execute(statement)
+        cursor.close()
+
     # Designate Orphans
     def set_orphan(self, filename):
-        cursor = self.conn.cursor()
+        cursor = self.get_cursor()
         statement = "UPDATE repository SET orphan = 1 WHERE filename = '%s'" % filename
         cursor.execute(statement)
         cursor.close()
 
 
+##################################
+# In-memory Database
+class MemoryDatabase():
+    """
+    Stand-in for LocalDatabase that keeps the repository, headings
+    and links in dictionaries for the life of the process.  It runs
+    the same checks, so findings match a run with a fresh cache, but
+    nothing is written to disk and there is no parse cache to reuse.
+    Files are FileRecords, and each file's headings and links are
+    held column-wise with interned anchors and paths.
+    """
+
+    def __init__(self, args, profiler = None):
+        self.args = args
+        self.profiler = profiler or Profiler()
+        self.last_id = 0
+        self.repository = {}
+        self.filenames = {}
+        self.headings = {}
+        self.inlinks = {}
+        self.exlinks = {}
+        self.problems = {}
+        self.checked = set()
+        self.changed_anchors = set()
+        self.dirty = set()
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    # Fetch Repository Rows Keyed by Filename
+    def get_repository(self):
+        return dict(self.repository)
+
+    # Record Modification Times
+    def update_repository(self, rows):
+        for filename, modtime, size, digest in rows:
+            row = self.repository.get(filename)
+            if row is None:
+                self.last_id += 1
+                row = FileRecord(self.last_id, sys.intern(filename))
+                self.repository[row.filename] = row
+                self.filenames[row.id] = row.filename
+            row.last_update = modtime
+            row.size = size
+            row.hash = digest
+
+    # Nothing Outlives the Process, so Every File is Scanned
+    def get_parse_cache(self, hashes, version):
+        return {}
+
+    def store_parse_cache(self, entries, version):
+        pass
+
+    # Drop Files Removed from the Source Tree
+    def remove_files(self, idrefs):
+        for (idref,) in idrefs:
+            self.headings.pop(idref, None)
+            self.inlinks.pop(idref, None)
+            self.exlinks.pop(idref, None)
+            self.problems.pop(idref, None)
+            filename = self.filenames.pop(idref, None)
+            if filename is not None:
+                del self.repository[filename]
+
+    # Revalidate Links from Parsed Files and Links Depending on Them
+    def validate_links(self, moved, anchors):
+        moved = set(row[0] for row in moved)
+        self.dirty = set()
+        pending = []
+        for source, links in self.inlinks.items():
+            checked = source in self.checked
+            for i, path in enumerate(links.paths):
+                if (checked or path in moved
+                        or (links.target(i), links.anchors[i]) in self.changed_anchors):
+                    self.dirty.add(source)
+
+                    # Re-resolve Targets of Added and Removed Files
+                    if path in moved:
+                        row = self.repository.get(path)
+                        links.targets[i] = row.id if row is not None else -1
+                    if not checked:
+                        pending.append((links, i))
+
+        # Resolve Links from Unparsed Files Against the Anchor Index
+        anchors.load(links.target(i) for links, i in pending)
+        for links, i in pending:
+            links.valid[i] = anchors.valid(links.target(i), links.anchors[i],
+                                           links.texts[i], links.paths[i])
+        self.changed_anchors = set()
+
+    # Fetch (file_id, anchor) Rows for the Given Files
+    def get_anchors(self, file_ids):
+        for file_id in file_ids:
+            if file_id in self.headings:
+                for anchor in self.headings[file_id].anchors:
+                    yield file_id, anchor
+
+    # List Files Whose Links Were Revalidated
+    def get_checked_files(self, every = False):
+        if every:
+            return sorted(self.repository)
+        return sorted(self.filenames[i] for i in self.dirty if i in self.filenames)
+
+    # Fetch Broken Links from Files Whose Links Were Revalidated
+    def get_broken_links(self, every = False):
+        rows = []
+        for source, links in self.inlinks.items():
+            filename = self.filenames.get(source)
+            if filename is None or not (every or source in self.dirty):
+                continue
+            rows += [(filename, links.lines[i], links.texts[i])
+                     for i, valid in enumerate(links.valid) if valid == 0]
+        rows.sort(key = lambda row: (row[0], row[1]))
+        return iter(rows)
+
+    # Fetch Rule Problems from Files Parsed by this Run
+    def get_problems(self, every = False):
+        rows = []
+        for file_id, problems in self.problems.items():
+            filename = self.filenames.get(file_id)
+            if filename is not None and (every or file_id in self.checked):
+                rows += [(filename,) + problem for problem in problems]
+        rows.sort(key = lambda row: (row[0], row[2]))
+        return iter(rows)
+
+    # List External Links Not Checked Within ttl Seconds
+    def get_stale_exlinks(self, ttl):
+        latest = {}
+        for links in self.exlinks.values():
+            for href, line, valid, last_check in links:
+                if last_check is not None and (href not in latest
+                                               or latest[href][0] < last_check):
+                    latest[href] = (last_check, valid)
+
+        # Share Results Between Rows for the Same URL
+        hrefs = set()
+        for links in self.exlinks.values():
+            for link in links:
+                hrefs.add(link[0])
+                if link[3] is None and link[0] in latest:
+                    link[3], link[2] = latest[link[0]]
+        limit = time.time() - ttl
+        return sorted(href for href in hrefs
+                      if href not in latest or latest[href][0] < limit)
+
+    # Record External Link Results
+    def update_exlinks(self, results):
+        results = {url: valid for valid, url in results}
+        clock = time.time()
+        for links in self.exlinks.values():
+            for link in links:
+                if link[0] in results:
+                    link[2] = results[link[0]]
+                    link[3] = clock
+
+    # Fetch Broken External Links
+    def get_broken_exlinks(self):
+        rows = []
+        for file_id, links in self.exlinks.items():
+            filename = self.filenames.get(file_id)
+            if filename is not None:
+                rows += [(filename, link[1], link[0]) for link in links
+                         if link[2] == 0 and link[3] is not None]
+        rows.sort(key = lambda row: (row[0], row[1]))
+        return iter(rows)
+
+    # Map Filenames to Repository Ids
+    def get_idrefs(self):
+        return {filename: row['id'] for filename, row in self.repository.items()}
+
+    # Replace Parsed Entries for Files
+    def store_files(self, stale, headings, inlinks, exlinks, problems):
+        self.checked = set(row[0] for row in stale)
+        previous = set((i, anchor) for i in self.checked if i in self.headings
+                       for anchor in self.headings[i].anchors)
+
+        # Keep External Link Results Across Re-parses
+        results = {}
+        for i in self.checked:
+            for href, line, valid, last_check in self.exlinks.get(i, ()):
+                if last_check is not None and (href not in results
+                                               or results[href][1] <= last_check):
+                    results[href] = (valid, last_check)
+
+        for i in self.checked:
+            self.headings.pop(i, None)
+            self.inlinks.pop(i, None)
+            self.exlinks.pop(i, None)
+            self.problems.pop(i, None)
+        for file_id, rule, line, detail in problems:
+            self.problems.setdefault(file_id, []).append((rule, line, detail))
+        grouped = {}
+        for anchor, file_id, line in headings:
+            grouped.setdefault(file_id, {}).setdefault(sys.intern(anchor), line)
+        for file_id, lines in grouped.items():
+            self.headings[file_id] = HeadingColumns(lines)
+        grouped = {}
+        for row in inlinks:
+            grouped.setdefault(row[0], []).append(row)
+        for source, rows in grouped.items():
+            self.inlinks[source] = LinkColumns(rows)
+        for href, file_id, line, valid in exlinks:
+            valid, last_check = results.get(href, (valid, None))
+            self.exlinks.setdefault(file_id, []).append(
+                [sys.intern(href), line, valid, last_check])
+
+        # Reduce to Anchors Added or Removed by this Run
+        current = set((i, anchor) for i in self.checked if i in self.headings
+                      for anchor in self.headings[i].anchors)
+        self.changed_anchors = previous ^ current
+
+    # Flag Orphans and Duplicates from the Toctree in Bulk
+    def update_toctree(self, duplicates, orphans):
+        for filename, row in self.repository.items():
+            row.orphan = int(filename in orphans)
+            row.duplicate = int(filename in duplicates)
+
+
+# Repository Row, Indexable by Column Name like sqlite3.Row
+class FileRecord():
+    __slots__ = ('id', 'filename', 'last_update', 'size', 'hash', 'orphan', 'duplicate')
+
+    def __init__(self, idref, filename):
+        self.id = idref
+        self.filename = filename
+        self.last_update = None
+        self.size = None
+        self.hash = None
+        self.orphan = None
+        self.duplicate = None
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+# Anchors of One File, First Line Kept for Repeats
+class HeadingColumns():
+    __slots__ = ('anchors', 'lines')
+
+    def __init__(self, lines):
+        self.anchors = tuple(lines)
+        self.lines = array.array('i', lines.values())
+
+
+# Internal Links of One File from inlinks Rows; Missing Values are Stored as -1
+class LinkColumns():
+    __slots__ = ('targets', 'valid', 'lines', 'texts', 'anchors', 'paths')
+
+    def __init__(self, rows):
+        self.targets = array.array('l', [-1 if row[1] is None else row[1] for row in rows])
+        self.valid = array.array('b', [-1 if row[2] is None else row[2] for row in rows])
+        self.lines = array.array('i', [row[3] for row in rows])
+        self.texts = tuple(row[4] for row in rows)
+        self.anchors = tuple(row[5] if row[5] is None else sys.intern(row[5])
+                             for row in rows)
+        self.paths = tuple(row[6] if row[6] is None else sys.intern(row[6])
+                           for row in rows)
+
+    def target(self, i):
+        target = self.targets[i]
+        return None if target < 0 else target
+
+
+##################################
+# Result Manifest
+class Manifest():
+    """
+    Snapshot of the source tree (path, mtime and size of each file)
+    and of the findings it produced, written as JSON after each run.
+    When a fresh stat sweep matches the snapshot, the findings are
+    replayed without opening the database; otherwise the findings for
+    files the run did not revisit are carried over from it.
+    """
+
+    version = 4
+
+    def __init__(self, path, config):
+        self.path = path
+        self.config = config
+        self.files = None
+        self.summary = []
+        self.links = {}
+        self.problems = {}
+        self.fresh = set()
+        self.fresh_problems = set()
+        self.fresh_summary = False
+
+    # Load the Snapshot, Returning False if it is Missing or Stale
+    def load(self):
+        try:
+            with open(self.path, encoding = 'utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or data.get('config') != self.config:
+            return False
+        try:
+            self.files = {path: tuple(stat) for path, stat in data['files'].items()}
+            self.summary = data['summary']
+            self.links = data['links']
+            self.problems = data['problems']
+        except (KeyError, TypeError, AttributeError):
+            return False
+        return True
+
+    # Remove the Snapshot while the Database is Being Updated
+    def begin(self):
+        self.fresh = set()
+        self.fresh_problems = set()
+        self.fresh_summary = False
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
+
+    def save(self, files):
+        self.files = files
+        self.links = {filename: links for filename, links in self.links.items()
+                      if filename in files and links}
+        self.problems = {filename: problems for filename, problems in self.problems.items()
+                         if filename in files and problems}
+        data = {'config': self.config, 'files': files, 'summary': self.summary,
+                'links': self.links, 'problems': self.problems}
+        temp = '%s.%d.tmp' % (self.path, os.getpid())
+        with open(temp, 'w', encoding = 'utf-8') as f:
+            json.dump(data, f, separators = (',', ':'))
+        os.replace(temp, self.path)
+
+    # Record a Finding; External Links Depend on Time, so are Never Replayed
+    def add(self, rule, filename, line, target):
+        if rule == 'broken-link':
+            self.fresh.add(filename)
+            self.links.setdefault(filename, []).append((line, target))
+        elif rule.startswith('summary-'):
+            self.summary.append((rule, filename, line, target))
+        elif Finding.rules[rule][1] == 'style':
+            self.fresh_problems.add(filename)
+            self.problems.setdefault(filename, []).append((rule, line, target))
+
+    def clear_links(self, filenames):
+        for filename in filenames:
+            self.fresh.add(filename)
+            self.links.pop(filename, None)
+
+    def clear_problems(self, filenames):
+        for filename in filenames:
+            self.fresh_problems.add(filename)
+            self.problems.pop(filename, None)
+
+    def clear_summary(self):
+        self.fresh_summary = True
+        self.summary = []
+
+    def findings(self):
+        for finding in self.summary:
+            yield finding
+        for filename in sorted(self.links):
+            for line, target in self.links[filename]:
+                yield ('broken-link', filename, line, target)
+        for filename in sorted(self.problems):
+            for rule, line, target in self.problems[filename]:
+                yield (rule, filename, line, target)
+
+    # Findings from the Snapshot the Current Run Left Untouched
+    def carried(self):
+        if not self.fresh_summary:
+            for finding in self.summary:
+                yield finding
+        for filename in sorted(self.links):
+            if filename not in self.fresh:
+                for line, target in self.links[filename]:
+                    yield ('broken-link', filename, line, target)
+        for filename in sorted(self.problems):
+            if filename not in self.fresh_problems:
+                for rule, line, target in self.problems[filename]:
+                    yield (rule, filename, line, target)
+
+
+##################################
+# Findings
+class Finding():
+
+    # Rule: (Level, Report Key, Message)
+    rules = {
+        'broken-link': ('error', 'broken_links', 'Broken link to %s.'),
+        'broken-external-link': ('warning', 'broken_exlinks',
+                                 'External link %s is unreachable.'),
+        'summary-duplicate': ('error', 'duplicates',
+                              '%s is listed more than once in SUMMARY.md.'),
+        'summary-orphan': ('warning', 'orphans', '%s is not listed in SUMMARY.md.'),
+        'line-length': ('warning', 'style', 'Line is too long (%s characters).'),
+        'heading-level': ('warning', 'style', 'Heading level jumps from %s.'),
+        'trailing-whitespace': ('warning', 'style', 'Trailing whitespace from column %s.')
+    }
+
+    __slots__ = ('rule', 'filename', 'line', 'target', 'book')
+
+    def __init__(self, rule, filename, line, target, book = None):
+        self.rule = rule
+        self.filename = filename
+        self.line = line
+        self.target = target
+        self.book = book
+
+    @property
+    def level(self):
+        return self.rules[self.rule][0]
+
+    @property
+    def message(self):
+        return self.rules[self.rule][2] % self.target
+
+    def to_dict(self):
+        return {'rule': self.rule, 'level': self.level, 'file': self.filename,
+                'line': self.line, 'target': self.target, 'message': self.message,
+                'book': None if self.book is None else self.book or '.'}
+
+
+# Open a Findings Writer, Inferring the Format from the Extension
+def open_writer(path, format = None, cwd = '.'):
+    if path is None:
+        return None
+    if format is None:
+        extension = os.path.splitext(path)[1]
+        format = FindingWriter.extensions.get(extension, 'jsonl')
+    if path == '-':
+        stream = sys.stdout
+    else:
+        stream = open(os.path.join(cwd, path), 'w', encoding = 'utf-8')
+    return FindingWriter.formats[format](stream)
+
+
+# Findings Writers
+class FindingWriter():
+    """
+    Writes findings to a stream as they are produced.  Subclasses
+    write the document head on construction and its tail on close(),
+    so no finding is held in memory once it has been written.
+    """
+
+    extensions = {'.jsonl': 'jsonl', '.json': 'jsonl', '.sarif': 'sarif',
+                  '.xml': 'junit', '.txt': 'text'}
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+        self.start()
+
+    def start(self):
+        pass
+
+    def write(self, finding):
+        self.stream.write(self.format(finding))
+        self.count += 1
+
+    def format(self, finding):
+        raise NotImplementedError
+
+    def end(self):
+        pass
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.end()
+        if self.stream is sys.stdout:
+            self.stream.flush()
+        else:
+            self.stream.close()
+
+
+class TextWriter(FindingWriter):
+
+    def format(self, finding):
+        if finding.line is None:
+            return '%s: %s\n' % (finding.filename, finding.message)
+        return '%s:%s: %s\n' % (finding.filename, finding.line, finding.message)
+
+
+class JSONLinesWriter(FindingWriter):
+
+    def format(self, finding):
+        return json.dumps(finding.to_dict()) + '\n'
+
+
+class SarifWriter(FindingWriter):
+
+    schema = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+    def start(self):
+        rules = [{'id': rule, 'shortDescription': {'text': message % '{0}'},
+                  'defaultConfiguration': {'level': level}}
+                 for rule, (level, key, message) in Finding.rules.items()]
+        head = json.dumps({
+            '$schema': self.schema,
+            'version': '2.1.0',
+            'runs': [{'tool': {'driver': {'name': 'mdlint', 'rules': rules}},
+                      'results': []}]
+        })
+        # Split the Document at the Empty Results Array
+        self.tail = head[head.rindex('[]') + 1:]
+        self.stream.write(head[:head.rindex('[]') + 1] + '\n')
+
+    def format(self, finding):
+        location = {'artifactLocation': {'uri': finding.filename}}
+        if finding.line is not None:
+            location['region'] = {'startLine': finding.line}
+        result = {
+            'ruleId': finding.rule,
+            'level': finding.level,
+            'message': {'text': finding.message},
+            'locations': [{'physicalLocation': location}]
+        }
+        if finding.book is not None:
+            result['properties'] = {'book': finding.book or '.'}
+        return '%s%s\n' % (',' if self.count else '', json.dumps(result))
+
+    def end(self):
+        self.stream.write(self.tail + '\n')
+
+
+class JUnitWriter(FindingWriter):
+
+    def start(self):
+        self.stream.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                          '<testsuites>\n<testsuite name="mdlint">\n')
+
+    def format(self, finding):
+        name = finding.rule if finding.line is None else '%s:%s' % (finding.rule,
+                                                                    finding.line)
+        return ('<testcase classname="%s" name="%s">'
+                '<failure type="%s" message="%s">%s</failure></testcase>\n'
+                % (html.escape(finding.filename), html.escape(name),
+                   finding.level, html.escape(finding.message),
+                   html.escape(finding.target, False)))
+
+    def end(self):
+        self.stream.write('</testsuite>\n</testsuites>\n')
+
+
+FindingWriter.formats = {'text': TextWriter, 'jsonl': JSONLinesWriter,
+                         'sarif': SarifWriter, 'junit': JUnitWriter}
+
+
+##################################
+# Run Profiler
+class Profiler():
+
+    def __init__(self, enabled = False):
+        self.enabled = enabled
+        self.cprofile = None
+        self.started = (time.perf_counter(), time.process_time())
+        self.phases = {}
+        self.counters = {
+            'files_read': 0,
+            'cache_hits': 0,
+            'bytes_read': 0,
+            'statements': 0,
+            'rows': 0
+        }
+
+    # Record Wall and CPU Time for a Phase
+    @contextlib.contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+            entry['wall'] += time.perf_counter() - wall
+            entry['cpu'] += time.process_time() - cpu
+            entry['calls'] += 1
+
+    def count(self, name, value = 1):
+        self.counters[name] += value
+
+    def start_cprofile(self):
+        import cProfile
+        self.cprofile = cProfile.Profile()
+        self.cprofile.enable()
+
+    def stop_cprofile(self, path):
+        self.cprofile.disable()
+        self.cprofile.dump_stats(path)
+        self.cprofile = None
+
+    # Write the Profile as JSON, to stdout for '-'
+    def write(self, path):
+        document = {
+            'wall': time.perf_counter() - self.started[0],
+            'cpu': time.process_time() - self.started[1],
+            'phases': self.phases,
+            'counters': self.counters
+        }
+        if path == '-':
+            json.dump(document, sys.stdout, indent = 2)
+            sys.stdout.write('\n')
+        else:
+            with open(path, 'w') as f:
+                json.dump(document, f, indent = 2)
+
+
+# Cursor Wrapper Counting Statements and Rows
+class ProfiledCursor():
+
+    def __init__(self, cursor, profiler):
+        self.cursor = cursor
+        self.profiler = profiler
+
+    def execute(self, statement, parameters = ()):
+        self.cursor.execute(statement, parameters)
+        self.profiler.count('statements')
+        self.count_changes()
+        return self
+
+    def executemany(self, statement, parameters):
+        parameters = list(parameters)
+        self.cursor.executemany(statement, parameters)
+        self.profiler.count('statements', len(parameters))
+        self.count_changes()
+        return self
+
+    def count_changes(self):
+        if self.cursor.rowcount > 0:
+            self.profiler.count('rows', self.cursor.rowcount)
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is not None:
+            self.profiler.count('rows')
+        return row
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self.profiler.count('rows', len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self.cursor:
+            self.profiler.count('rows')
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
 ##################################
 # File Handler
 class TextFileHandler():
 
+    bom = b'\xef\xbb\xbf'
+    map_threshold = 65536
+
     def __init__(self, filename):
         self.filename = filename
+        self.mapped = None
+        self.data = b''
+        self.line_offset = 0
+        self.line_count = 1
+        self.invalid = False
+        self.skipped_bom = False
+
+    # Read File as Bytes, Memory-mapping Large Files
+    def read(self):
+        with open(self.filename, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= self.map_threshold:
+                self.mapped = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+                self.data = memoryview(self.mapped)
+            else:
+                self.data = f.read()
+
+        # Skip UTF-8 Byte Order Mark
+        if self.data[:3] == self.bom:
+            self.data = self.data[3:]
+            self.skipped_bom = True
+        return self.data
+
+    # Hash of the Whole File as Read, Byte Order Mark Included
+    def digest(self):
+        digest = hashlib.blake2b(digest_size = 16)
+        if self.skipped_bom:
+            digest.update(self.bom)
+        digest.update(self.data)
+        return digest.hexdigest()
+
+    # Decode a Span of the File
+    def decode(self, start, end):
+        raw = bytes(self.data[start:end])
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError as error:
+            if not self.invalid:
+                self.invalid = True
+                logger.warning("Invalid UTF-8 in %s at byte %s, replacing."
+                                % (self.filename, start + error.start))
+            return raw.decode('utf-8', 'replace')
+
+    # Line Number for an Offset, Counting Forward from the Last Lookup
+    def lineno(self, offset):
+        if offset < self.line_offset:
+            self.line_offset = 0
+            self.line_count = 1
+        if isinstance(self.data, bytes):
+            self.line_count += self.data.count(b'\n', self.line_offset, offset)
+        else:
+            self.line_count += bytes(self.data[self.line_offset:offset]).count(b'\n')
+        self.line_offset = offset
+        return self.line_count
+
+    # Decoded Lines, for Small Files Read Whole
+    def lines(self):
+        return self.decode(0, len(self.read())).splitlines(True)
 
-    def open(self):
-        self.readfile = open(self.filename, 'r')
-        return self.readfile
-    
     def close(self):
-        self.readfile.close()
-        
+        if isinstance(self.data, memoryview):
+            self.data.release()
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        self.data = b''
+
+
+# Digest of a File's Content, Keying the Parse Cache
+def content_hash(filename):
+    f = TextFileHandler(filename)
+    f.read()
+    try:
+        return f.digest()
+    finally:
+        f.close()
+
+
+# Parse Worker, Returns (filename, headings, links, problems, content hash)
+def scan_file(filename, root = '', rules = ()):
+    scan = Scanner(os.path.join(root, filename), rules).scan()
+    return (filename, scan.headings, scan.links, scan.problems, scan.digest)
+
+
+# Key for Cached Parses: the Scanner Version and any Enabled Rules
+def parser_version(rules = ()):
+    if not rules:
+        return Scanner.version
+    return '%s+%s' % (Scanner.version, ','.join(
+        ':'.join([name] + [str(getattr(Rule.registry[name], i))
+                           for i in Rule.registry[name].settings])
+        for name in sorted(rules)))
+
+
+##################################
+# Block Scanner
+class Scanner():
+
+    # Bump when Changes Alter Extracted Headings or Links
+    version = 2
+
+    # Line-start Patterns: (First Line, After a Newline)
+    fence_patterns = (re.compile(rb'[ \t]*(```|~~~)[^\n]*'),
+                      re.compile(rb'\n[ \t]*(```|~~~)[^\n]*'))
+    heading_patterns = (re.compile(rb'#+ [^\n]*'),
+                        re.compile(rb'\n#+ [^\n]*'))
+    table_patterns = (re.compile(rb'[ \t]*\|[^\n]*'),
+                      re.compile(rb'\n[ \t]*\|[^\n]*'))
+    link_pattern = re.compile(rb'\[([^\]\n]*)\]\(([^)\n]*)\)')
+
+    def __init__(self, filename, rules = ()):
+        self.filename = filename
+        self.headings = []
+        self.links = []
+        self.problems = []
+        self.digest = None
+        self.slugger = Slugger()
+
+        # Subscribe each Rule's on_<kind> Handlers to its Token Kinds;
+        # Line Rules with a line_pattern See Only the Lines it Matches
+        self.rules = [Rule.registry[name]() for name in rules]
+        self.handlers = {}
+        self.line_filters = []
+        for rule in self.rules:
+            for kind in rule.tokens:
+                if kind == 'line' and rule.line_pattern is not None:
+                    self.line_filters.append((rule.line_pattern, rule.on_line))
+                else:
+                    self.handlers.setdefault(kind, []).append(getattr(rule, 'on_' + kind))
+
+    # Pass a Token to the Rules Subscribed to its Kind
+    def dispatch(self, kind, *token):
+        for handler in self.handlers[kind]:
+            handler(*token)
+
+    # Read File Once, Collecting Headings and Links
+    def scan(self):
+        f = TextFileHandler(self.filename)
+        data = f.read()
+        self.digest = f.digest()
+
+        # Split into Segments Outside Fenced Code Blocks
+        segments = []
+        fences = []
+        pos = 0
+        fence = None
+        for start, match in self.find_lines(self.fence_patterns, data, 0, len(data)):
+            if fence is None:
+                fence = bytes(match.group(1))
+                segments.append((pos, start))
+                fences.append((start, match.end(1), match.end()))
+            elif bytes(match.group(1)) == fence:
+                fence = None
+                pos = match.end()
+                fences[-1] += (pos,)
+        if fence is None:
+            segments.append((pos, len(data)))
+        else:
+            fences[-1] += (len(data),)
+
+        # Headings
+        for pos, endpos in segments:
+            for start, match in self.find_lines(self.heading_patterns, data, pos, endpos):
+                text = f.decode(start, match.end())
+                anchor = self.parse_heading(text)
+                if anchor is not None:
+                    lineno = f.lineno(start)
+                    self.headings.append((lineno, anchor))
+                    if 'heading' in self.handlers:
+                        level = len(text) - len(text.lstrip('#'))
+                        self.dispatch('heading', lineno, level, text)
+
+        # Links
+        for pos, endpos in segments:
+            for match in self.link_pattern.finditer(data, pos, endpos):
+                title = f.decode(*match.span(1))
+                link = f.decode(*match.span(2)).strip()
+                self.links.append((f.lineno(match.start()), title, link))
+                if 'link' in self.handlers:
+                    self.dispatch('link', self.links[-1][0], title, link)
+
+        # Tokens Only Subscribed Rules Pay for
+        if self.rules:
+            self.scan_rules(f, data, segments, fences)
+
+        f.close()
+        return self
+
+    # Dispatch Fence, Table and Line Tokens, then Collect Problems by Line
+    def scan_rules(self, f, data, segments, fences):
+        if 'fence' in self.handlers:
+            for start, info, info_end, end in fences:
+                self.dispatch('fence', f.lineno(start), f.lineno(end),
+                              f.decode(info, info_end).strip())
+        if 'table' in self.handlers:
+            for pos, endpos in segments:
+                for start, match in self.find_lines(self.table_patterns, data, pos, endpos):
+                    self.dispatch('table', f.lineno(start), f.decode(start, match.end()))
+        if 'line' in self.handlers or self.line_filters:
+            text = f.decode(0, len(data))
+            if 'line' in self.handlers:
+                for lineno, line in enumerate(text.split('\n'), 1):
+                    self.dispatch('line', lineno, line[:-1] if line[-1:] == '\r' else line)
+            for pattern, handler in self.line_filters:
+                self.filter_lines(text, pattern, handler)
+        for rule in self.rules:
+            self.problems += rule.problems
+        self.problems.sort(key = lambda problem: (problem[1], problem[0]))
+
+    # Pass a Line Rule Only the Lines its Pattern Matches
+    def filter_lines(self, text, pattern, handler):
+        lineno = 1
+        pos = 0
+        end = -1
+        for match in pattern.finditer(text):
+            if match.start() <= end:
+                continue
+            start = text.rfind('\n', 0, match.start()) + 1
+            lineno += text.count('\n', pos, start)
+            pos = start
+            end = text.find('\n', match.start())
+            if end < 0:
+                end = len(text)
+            line = text[start:end]
+            handler(lineno, line[:-1] if line[-1:] == '\r' else line)
+
+    # Match at Line Starts, Yielding (line offset, match)
+    def find_lines(self, patterns, data, pos, endpos):
+        first, rest = patterns
+        if pos == 0:
+            match = first.match(data, 0, endpos)
+            if match is not None:
+                yield (0, match)
+        for match in rest.finditer(data, pos, endpos):
+            yield (match.start() + 1, match)
+
+    # Reduce Heading to Anchor
+    def parse_heading(self, text):
+        match = self.slugger.heading_pattern.match(text.rstrip())
+        if match is not None:
+            return self.slugger.slug(match.group(1))
+
+
+##################################
+# Style Rules
+class Rule():
+    """
+    Check run during the shared scan.  A rule names the token kinds
+    it consumes in tokens; Scanner calls its on_<kind> method for each
+    token of those kinds and nothing else, so a rule costs only what
+    it subscribes to.  Tokens are:
+
+        line     (lineno, text)                   every line, without its newline
+        heading  (lineno, level, text)            headings outside code fences
+        link     (lineno, title, target)          inline links outside code fences
+        fence    (start, end, info)               fenced code blocks
+        table    (lineno, text)                   table rows outside code fences
+
+    A line rule may set line_pattern to a regular expression; it is
+    then run over the whole file and only lines it matches are passed
+    on, so the rule costs a regex search rather than a call per line.
+    Rules record problems with report().  New rules are added to
+    Rule.registry and enabled by name; settings lists class
+    attributes that change the results, so cached parses are redone
+    when they change.
+    """
+
+    name = None
+    tokens = ()
+    settings = ()
+    line_pattern = None
+
+    def __init__(self):
+        self.problems = []
+
+    def report(self, lineno, detail):
+        self.problems.append((self.name, lineno, detail))
+
+
+class LineLength(Rule):
+
+    name = 'line-length'
+    tokens = ('line',)
+    settings = ('limit',)
+    limit = 72
+
+    def __init__(self):
+        Rule.__init__(self)
+        self.line_pattern = re.compile('^.{%d,}' % (self.limit + 1), re.M)
+
+    def on_line(self, lineno, text):
+        if len(text) > self.limit:
+            self.report(lineno, '%s > %s' % (len(text), self.limit))
+
+
+class HeadingLevel(Rule):
+
+    name = 'heading-level'
+    tokens = ('heading',)
+
+    def __init__(self):
+        Rule.__init__(self)
+        self.level = None
+
+    # Headings Go Down One Level at a Time
+    def on_heading(self, lineno, level, text):
+        if self.level is not None and level > self.level + 1:
+            self.report(lineno, 'h%s to h%s' % (self.level, level))
+        self.level = level
+
+
+class TrailingWhitespace(Rule):
+
+    name = 'trailing-whitespace'
+    tokens = ('line',)
+    line_pattern = re.compile('[ \t]\r?$', re.M)
+
+    def on_line(self, lineno, text):
+        if text[-1:] in (' ', '\t'):
+            self.report(lineno, str(len(text.rstrip(' \t')) + 1))
+
+
+Rule.registry = {rule.name: rule for rule in (LineLength, HeadingLevel, TrailingWhitespace)}
+
+
+##################################
+# GitBook Heading Anchors
+class Slugger():
+    """
+    Reproduces the heading ids GitBook generates: inline links are
+    reduced to their text, the heading is lowercased, punctuation and
+    emoji are dropped and each whitespace character becomes a hyphen.
+    Repeated headings on a page take -1, -2, ... suffixes.
+    """
+
+    heading_pattern = re.compile(r' *#{1,6} +(.+?) *#* *$')
+    inline_pattern = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+    whitespace = ' \t\n\x0b\x0c\r\xa0\u1680\u3000\ufeff'
+
+    # Translation Table: Whitespace to Hyphens, Punctuation and Emoji Dropped
+    table = dict.fromkeys(map(ord, whitespace), '-')
+    table.update(dict.fromkeys(map(ord, '\\\'!"#$%&()*+,./:;<=>?@[]^`{|}~')))
+    for first, last in ((0x2000, 0x206F), (0x2E00, 0x2E7F), (0x2600, 0x27BF),
+                        (0x2B00, 0x2BFF), (0xFE00, 0xFE0F), (0x1F000, 0x1FAFF)):
+        table.update(dict.fromkeys(range(first, last + 1)))
+    del first, last
+
+    def __init__(self):
+        self.occurrences = {}
+
+    def slug(self, text):
+        base = self.inline_pattern.sub(r'\1', text)
+        base = base.strip(self.whitespace).lower().translate(self.table)
+
+        # Suffix Repeated Slugs
+        slug = base
+        while slug in self.occurrences:
+            self.occurrences[base] += 1
+            slug = '%s-%d' % (base, self.occurrences[base])
+        self.occurrences[slug] = 0
+        return slug
+
+
+##################################
+# Per-run Anchor Index
+class AnchorIndex():
+    """
+    Maps repository ids to the set of anchors in each file for one
+    run.  Files parsed by the run are added as they are scanned, and
+    other link targets are loaded from the database in one query, so
+    each link resolves with a set lookup.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self.anchors = {}
+
+    def add(self, file_id, anchors):
+        self.anchors[file_id] = set(anchors)
+
+    # Load Anchors for Targets Not Yet Indexed
+    def load(self, file_ids):
+        missing = set(file_ids).difference(self.anchors)
+        missing.discard(None)
+        if missing:
+            for file_id in missing:
+                self.anchors[file_id] = set()
+            for file_id, anchor in self.database.get_anchors(missing):
+                self.anchors[file_id].add(anchor)
+
+    # Links Outside the Book are Not Checked; Malformed Links Never Resolve
+    def valid(self, target_id, anchor, link, target_path):
+        if '"' in link or '\\' in link:
+            return 0
+        if target_path is None:
+            return 1
+        if target_id is None:
+            return 0
+        if anchor is not None and anchor not in self.anchors[target_id]:
+            return 0
+        return 1
+
+
+##################################
+# Source Discovery
+class SourceWalker():
+
+    ignore_files = ('.gitignore', '.bookignore', '.ignore')
+    defaults = ['.git/', '_book/', 'node_modules/']
+
+    def __init__(self, root, ext = '.md'):
+        self.root = root
+        self.ext = ext
+        self.patterns = [self.compile_pattern(i) for i in self.read_ignores()]
+
+    # Read Ignore Patterns from the Book Root
+    def read_ignores(self):
+        patterns = list(self.defaults)
+        for name in self.ignore_files:
+            path = os.path.join(self.root, name)
+            if os.path.isfile(path):
+                f = TextFileHandler(path)
+                for line in f.lines():
+                    line = line.strip()
+                    if line != '' and line[0] != '#':
+                        patterns.append(line)
+                f.close()
+        return patterns
+
+    # Compile gitignore-style Pattern
+    def compile_pattern(self, pattern):
+        negate = pattern.startswith('!')
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        if pattern.startswith('**/'):
+            pattern = pattern[3:]
+        anchored = '/' in pattern
+        match = re.compile(fnmatch.translate(pattern.lstrip('/'))).match
+        return (match, negate, dir_only, anchored)
+
+    # Check Path Against Ignore Patterns
+    def ignored(self, path, name, is_dir):
+        result = False
+        for match, negate, dir_only, anchored in self.patterns:
+            if dir_only and not is_dir:
+                continue
+            if match(path if anchored else name):
+                result = not negate
+        return result
+
+    # Walk Source Tree, Returning {path: (mtime in ns, size)}
+    def walk(self, base = ''):
+        found = {}
+        pending = [base]
+        self.directories = []
+        while pending:
+            base = pending.pop()
+            self.directories.append(base)
+            with os.scandir(os.path.join(self.root, base)) as entries:
+                for entry in entries:
+                    path = base + entry.name
+                    if entry.is_dir(follow_symlinks = False):
+                        if not self.ignored(path, entry.name, True):
+                            pending.append(path + '/')
+                    elif entry.name.endswith(self.ext):
+                        if not self.ignored(path, entry.name, False):
+                            stat = entry.stat()
+                            found[path] = (stat.st_mtime_ns, stat.st_size)
+        return found
+
+
+##################################
+# SUMMARY.md Table of Contents
+class Toctree():
+
+    entry_pattern = re.compile(r'^([ \t]*)[*+-][ \t]+\[([^\]]*)\]\(([^)]*)\)')
+    unlisted = ('SUMMARY.md', 'README.md')
+
+    def __init__(self, filename, base = ''):
+        self.filename = filename
+        self.path = os.path.join(base, filename)
+        self.root = posixpath.dirname(filename)
+
+        # Entries are (lineno, depth, parent, title, path), Paths from the Source Root
+        self.entries = []
+        self.duplicates = []
+        self.files = set()
+
+    # Read Entries in One Pass, Tracking Nesting by Indentation
+    def parse(self):
+        f = TextFileHandler(self.path)
+        chapters = []
+        lineno = 0
+        for line in f.lines():
+            lineno += 1
+            match = self.entry_pattern.match(line)
+            if match is None:
+                continue
+
+            indent = len(match.group(1).expandtabs(4))
+            while chapters and chapters[-1][0] >= indent:
+                chapters.pop()
+            parent = chapters[-1][1] if chapters else None
+
+            path = match.group(3).strip().split('#')[0]
+            if path != '':
+                path = posixpath.normpath(posixpath.join(self.root, path))
+            entry = (lineno, len(chapters), parent, match.group(2), path)
+            self.entries.append(entry)
+            chapters.append((indent, path))
+
+            # Check for Duplication
+            if path == '':
+                pass
+            elif path in self.files:
+                self.duplicates.append(entry)
+            else:
+                self.files.add(path)
+
+        f.close()
+        return self
+
+    # Source Files Missing from the Table of Contents
+    def orphans(self, filenames):
+        unlisted = [posixpath.join(self.root, i) for i in self.unlisted]
+        return sorted(set(filenames).difference(self.files, unlisted))
+
+
+##################################
+# Watch Mode
+class Watcher():
+
+    debounce = 0.02
+
+    def __init__(self, main, socket_path = None, interval = 0.5):
+        self.main = main
+        self.interval = interval
+        self.server = None
+        self.clients = []
+
+        # Prefer inotify, Fall Back to Polling
+        try:
+            self.events = InotifyEvents(main.walker, main.filestats)
+        except (OSError, AttributeError):
+            self.events = PollingEvents(main.walker, main.filestats)
+        logger.info("Watching for changes with %s." % type(self.events).__name__)
+
+        # Serve Findings on a Unix Socket
+        if socket_path is not None:
+            socket_path = os.path.join(main.cwd, socket_path)
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(socket_path)
+            self.server.listen(5)
+
+    # Main Loop
+    def run(self):
+        try:
+            while True:
+                readers = [self.events] + ([self.server] if self.server else [])
+                if self.events.fileno() is None:
+                    timeout = self.interval
+                    readers.remove(self.events)
+                else:
+                    timeout = None
+                ready = select.select(readers, [], [], timeout)[0]
+
+                if self.server in ready:
+                    client = self.server.accept()[0]
+                    self.clients.append(client)
+
+                if self.events in ready or self.events.fileno() is None:
+                    paths = self.events.read()
+                    if self.events.fileno() is not None:
+                        time.sleep(self.debounce)
+                        paths |= self.events.read()
+                    if paths:
+                        self.relint(paths)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    # Re-lint Touched Files and their Dependents
+    def relint(self, paths):
+        start = time.time()
+        self.main.refresh_filelist(sorted(paths))
+        self.main.lint()
+        elapsed = (time.time() - start) * 1000
+        logger.debug("Re-linted %s in %.1f ms." % (', '.join(sorted(paths)), elapsed))
+
+        # Toctree Findings; All when the Toctree was Re-read, else those of Touched Files
+        toctree = {}
+        for book in self.main.books:
+            summary = posixpath.join(book, 'SUMMARY.md')
+            entry = self.main.report.get(summary)
+            if entry is None or 'duplicates' not in entry:
+                continue
+            findings = ([(summary, 'summary-duplicate', i) for i in entry['duplicates']]
+                        + [(i, 'summary-orphan', i) for i in entry['orphans']])
+            for filename, rule, target in findings:
+                toctree.setdefault(filename, []).append('%s: %s\n' % (filename, Finding(
+                    rule, filename, None, target).message))
+        output = ''
+        if self.main.summary_read:
+            output = ''.join(line for lines in toctree.values() for line in lines)
+
+        for filename in sorted(set(self.main.checked).union(self.main.source)):
+            entry = self.main.report.get(filename)
+            if not self.main.summary_read:
+                output += ''.join(toctree.get(filename, ()))
+            if (entry is None or not entry['broken_links'] and not entry['broken_exlinks']
+                    and not entry['style']):
+                if filename not in toctree:
+                    output += '%s: ok\n' % filename
+            else:
+                for line, link in entry['broken_links']:
+                    output += '%s:%s: broken link %s\n' % (filename, line, link)
+                for line, link in entry['broken_exlinks']:
+                    output += '%s:%s: broken external link %s\n' % (filename, line, link)
+                for line, rule, target in entry['style']:
+                    output += '%s:%s: %s\n' % (filename, line, Finding(
+                        rule, filename, line, target).message)
+        if output != '':
+            self.write(output)
+        if self.main.output is not None:
+            self.main.output.flush()
+
+    # Write Findings to the Terminal and Connected Clients
+    def write(self, output):
+        sys.stdout.write(output)
+        sys.stdout.flush()
+        data = output.encode()
+        for client in list(self.clients):
+            try:
+                client.sendall(data)
+            except OSError:
+                self.clients.remove(client)
+                client.close()
+
+    def close(self):
+        self.events.close()
+        for client in self.clients:
+            client.close()
+        if self.server is not None:
+            path = self.server.getsockname()
+            self.server.close()
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# inotify(7) Events through libc
+class InotifyEvents():
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_ISDIR = 0x40000000
+    mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    header = struct.Struct('iIII')
+
+    def __init__(self, walker, filestats):
+        self.walker = walker
+        self.filestats = filestats
+        import ctypes, ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno = True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        for base in walker.directories:
+            self.add_watch(base)
+
+    def add_watch(self, base):
+        path = os.path.join(self.walker.root, base).encode()
+        wd = self.libc.inotify_add_watch(self.fd, path, self.mask)
+        if wd >= 0:
+            self.watches[wd] = base
+
+    # Forget Watches on a Directory that Left the Tree, and Below it
+    def remove_watches(self, base):
+        for wd, directory in list(self.watches.items()):
+            if directory.startswith(base):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def fileno(self):
+        return self.fd
+
+    # Drain Pending Events, Returning Touched Paths
+    def read(self):
+        paths = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return paths
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = self.header.unpack_from(data, offset)
+                offset += self.header.size
+                name = data[offset:offset + length].rstrip(b'\0').decode()
+                offset += length
+                base = self.watches.get(wd)
+                if base is None or name == '':
+                    continue
+                path = base + name
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        if not self.walker.ignored(path, name, True):
+                            paths.update(self.walker.walk(path + '/'))
+                            for directory in self.walker.directories:
+                                self.add_watch(directory)
+                    elif mask & (self.IN_MOVED_FROM | self.IN_DELETE):
+                        paths.update(i for i in self.filestats
+                                     if i.startswith(path + '/'))
+                        self.remove_watches(path + '/')
+                elif mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+                             | self.IN_MOVED_FROM | self.IN_DELETE):
+                    paths.add(path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+# Polling Fallback for Platforms Without inotify
+class PollingEvents():
+
+    def __init__(self, walker, filestats):
+        self.walker = walker
+        self.snapshot = dict(filestats)
+
+    def fileno(self):
+        return None
+
+    # Walk the Tree, Returning Paths Whose Stats Differ
+    def read(self):
+        current = self.walker.walk()
+        paths = set(self.snapshot) ^ set(current)
+        for path, stat in current.items():
+            if path in self.snapshot and self.snapshot[path] != stat:
+                paths.add(path)
+        self.snapshot = current
+        return paths
+
+    def close(self):
+        pass
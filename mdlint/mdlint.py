@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
-import sys, os, subprocess, collections
+import sys, os, re, subprocess, threading
+try:
+    from .libmdlint import Toctree
+except ImportError:
+    from libmdlint import Toctree
 
 
 ####################################################
@@ -13,6 +17,10 @@ class Report():
     markdown source.
     """
 
+    # GitBook Builds Run Alongside the Syntax Checks, e.g. ('html', 'pdf')
+    build_formats = ('html',)
+    ansi_pattern = re.compile(r'\x1b\[[0-9;]*m')
+
     # Initialize the Class
     def __init__(self, arguments):
         """
@@ -39,24 +47,28 @@ class Report():
         basedir = os.curdir
         os.chdir(self.args.source)
 
-        # Run the build and record errors
+        # Start the builds, run the syntax checks while they work,
+        # then wait for the builds and record errors
+        self.builds = []
         if not self.args.nobuild:
             self.run_build()
 
-        # Run the syntax checks and record errors
         if not self.args.nosyntax:
             self.run_syntax()
 
+        self.wait_build()
+
         # Print Report
         self.print_report()
 
     def run_build(self):
         """
-        run_build() method calls GitBook to build the HTML documentation
-          from the source files found in args.source.  It records the 
-          output from this command in a variable and then parses it for 
-          warnings, recording them at self.report['build_warnings'] and 
-          self.report['build_status'].
+        run_build() method starts GitBook builds of the documentation in
+          each of build_formats from the source files found in
+          args.source, and returns without waiting for them.  A reader
+          thread per build parses its output line by line as it arrives,
+          recording warnings at self.report['build_warnings'][format];
+          wait_build() sets self.report['build_status'].
         """
 
         command = ['node', '--stack-size=3200']
@@ -70,17 +82,36 @@ class Report():
             command = ['gitbook']
 
         # Add the Build Command, and the source directory
-        html_command = command + ['build', self.args.source]
-        # add pdf_command
-
-        output = subprocess.check_output(html_command).decode().split('\n')
-        for line in output:
-            if '\x1b[0;33mwarn:' in line:
-                self.report['build_warnings'] = line
+        actions = {'html': 'build', 'pdf': 'pdf'}
+        for name in self.build_formats:
+            process = subprocess.Popen(
+                command + [actions[name], self.args.source],
+                stdout = subprocess.PIPE, stderr = subprocess.STDOUT,
+                universal_newlines = True, errors = 'replace')
+            build = {'name': name, 'process': process, 'done': False}
+            build['reader'] = threading.Thread(target = self.read_build,
+                                               args = (build,))
+            build['reader'].start()
+            self.builds.append(build)
+
+    # Parse Build Output as it Arrives
+    def read_build(self, build):
+        warnings = self.report['build_warnings'].setdefault(build['name'], [])
+        for line in build['process'].stdout:
+            line = self.ansi_pattern.sub('', line).strip()
+            if line.startswith('warn:'):
+                warnings.append(line[len('warn:'):].strip())
             elif 'Done, without error' in line:
-                self.report['build_status'] = True
-
+                build['done'] = True
+        build['process'].stdout.close()
 
+    # Wait for the Builds, Passing only if Every One Succeeded
+    def wait_build(self):
+        for build in self.builds:
+            build['reader'].join()
+            build['done'] &= build['process'].wait() == 0
+        if self.builds:
+            self.report['build_status'] = all(build['done'] for build in self.builds)
 
 
     # Check for syntactic and stylistic issues
@@ -135,53 +166,17 @@ class Report():
         complete_list = self.gen_manifest('.md', True)
         complete_list.remove('SUMMARY.md')
 
-        # Open SUMMARY.md
-        f = open('SUMMARY.md', 'r')
-        target_dir = {}
-        target_dup = []
-        count = 1
-
-        # Parse SUMMARY.md for Links and Link Titles
-        for line in f:
-            linenum = str(count)
-            link = self.parse_link(line)
-
-            if link != None:
-                target_dir[link[0]] = link[1]
-                target_dup.append(link[0])
-
-            # Increment Line
-            count += 1
-
-        f.close()
+        # Parse SUMMARY.md into the Shared Toctree Model
+        toctree = Toctree('SUMMARY.md').parse()
 
         # Check that source files and SUMMARY.md lists match
-        for i in complete_list:
-            try:
-                check = target_dir[i]
-            except:
-                self.report['summary_orphans'].append(i)
+        self.report['summary_orphans'] = toctree.orphans(complete_list)
 
         # Check for Duplication
-        counter = collections.Counter(target_dup)
-        for i in counter.items():
-            if i[1] > 1:
-                self.report['summary_duplicates'].append(i[0])
+        duplicates = [entry[4] for entry in toctree.duplicates]
+        self.report['summary_duplicates'] = list(dict.fromkeys(duplicates))
 
 
-    # Parse Links
-    def parse_link(self, raw_text):
-        """
-        parse_link() method receives link text written in markdown, it
-          separates the link text from the href and returns a tuple 
-          containing both.
-        """
-        text = raw_text.split('](')
-        if len(text) > 1:
-            title = text[0].split('[')[1]
-            link = text[1].split(')')[0]
-            return [link, title]
-
     #################################################
     # Format Output
 
@@ -194,12 +189,30 @@ class Report():
         """
         output = ''
 
+        output += self.print_build()
         output += self.print_summary()
 
         output += '\n\n' + '=' * self.line_length + '\n'
 
         print(output)
 
+    def print_build(self):
+        if self.args.nobuild:
+            return ''
+
+        output = '\n\n' + '=' * self.line_length + '\n\n'
+        output += 'GitBook build\n'
+        for name in self.build_formats:
+            warnings = self.report['build_warnings'].get(name, [])
+            if len(warnings) > 0:
+                output += '   Warnings from the %s build:\n' % name
+                output += self.print_list(warnings)
+        if self.report['build_status']:
+            output += '   Check the Build............. [PASSED]\n'
+        else:
+            output += '   Check the Build................. [ERROR]\n'
+        return output
+
     def print_summary(self):
 
         output = '\n\n' + '=' * self.line_length + '\n\n'
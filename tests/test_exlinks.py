@@ -0,0 +1,87 @@
+import http.server
+import os
+import socket
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from mdlint.exlinks import LinkChecker
+
+
+####################################################
+# Local HTTP Stand-in
+class StandIn(http.server.BaseHTTPRequestHandler):
+    """
+    Answers /ok with 200, /nohead with 405 to HEAD but 200 to GET,
+    and anything else with 404, recording each request it serves.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def respond(self):
+        self.requests.append((self.command, self.path))
+        if self.path.startswith('/ok'):
+            status = 200
+        elif self.path.startswith('/nohead'):
+            status = 405 if self.command == 'HEAD' else 200
+        else:
+            status = 404
+        body = b'' if self.command == 'HEAD' else b'stand-in'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_HEAD = respond
+    do_GET = respond
+
+    def log_message(self, *args):
+        pass
+
+
+class LinkCheckerTest(unittest.TestCase):
+
+    def setUp(self):
+        StandIn.requests = []
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+        self.thread = threading.Thread(target = self.server.serve_forever, daemon = True)
+        self.thread.start()
+        self.base = 'http://127.0.0.1:%d' % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    # A Port Nothing Listens on
+    def closed_port(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            return probe.getsockname()[1]
+
+    def test_statuses(self):
+        refused = 'http://127.0.0.1:%d/ok' % self.closed_port()
+        urls = [self.base + '/ok', self.base + '/missing', self.base + '/nohead', refused]
+        results = LinkChecker(timeout = 5).check(urls)
+        self.assertEqual(results, {
+            self.base + '/ok': 200,
+            self.base + '/missing': 404,
+            self.base + '/nohead': 200,
+            refused: None
+        })
+
+    def test_head_falls_back_to_get(self):
+        LinkChecker(timeout = 5).check([self.base + '/nohead'])
+        self.assertEqual(StandIn.requests, [('HEAD', '/nohead'), ('GET', '/nohead')])
+
+    def test_duplicates_probed_once(self):
+        url = self.base + '/ok'
+        results = LinkChecker(timeout = 5).check([url, url, url])
+        self.assertEqual(results, {url: 200})
+        self.assertEqual(StandIn.requests, [('HEAD', '/ok')])
+
+
+if __name__ == '__main__':
+    unittest.main()